@@ -0,0 +1,163 @@
+from datetime import date, datetime, time
+from typing import Optional
+
+from models.order import Order
+from models.order_archive import OrderArchive
+import rollups
+import archive
+
+# Filtered analytics run as a single aggregation over the orders collection so
+# only the final totals leave MongoDB. Unfiltered requests use the rollups.
+
+def _to_object_id(expr):
+    return {"$convert": {"input": expr, "to": "objectId", "onError": None, "onNull": None}}
+
+def build_match(start_date: Optional[date] = None, end_date: Optional[date] = None,
+                sales_channel: Optional[str] = None, live_selling_event_id: Optional[str] = None):
+    match = {}
+    if start_date or end_date:
+        # sold_date is stored as a datetime by the BSON encoder
+        sold_date = {}
+        if start_date:
+            sold_date["$gte"] = datetime.combine(start_date, time.min)
+        if end_date:
+            sold_date["$lte"] = datetime.combine(end_date, time.min)
+        match["sold_date"] = sold_date
+    if sales_channel:
+        match["sales_channel"] = sales_channel
+    if live_selling_event_id:
+        match["live_selling_event_id"] = live_selling_event_id
+    return match
+
+def build_pipeline(match):
+    def product_field(field):
+        return {
+            "$ifNull": [
+                {"$first": {"$map": {
+                    "input": {"$filter": {
+                        "input": "$product_docs",
+                        "as": "p",
+                        "cond": {"$eq": [{"$toString": "$$p._id"}, "$$i.product_id"]},
+                    }},
+                    "as": "p",
+                    "in": f"$$p.{field}",
+                }}},
+                0,
+            ]
+        }
+    return [
+        {"$match": match},
+        {"$unionWith": {"coll": OrderArchive.get_motor_collection().name, "pipeline": archive.unwind_pipeline(match)}},
+        # An equality lookup on _id, so each order is an index lookup per product
+        {"$addFields": {"product_oids": {"$map": {"input": "$products", "as": "i", "in": _to_object_id("$$i.product_id")}}}},
+        {"$lookup": {
+            "from": "products",
+            "localField": "product_oids",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"purchase_price": 1, "shipping_fee": 1}}],
+            "as": "product_docs",
+        }},
+        {"$project": {
+            "status": 1,
+            "live_selling_event_id": 1,
+            "revenue": 1,
+            # Order.cost_at_sale(): the stored base_cost, or for orders from
+            # before base_cost, Order.product_cost() + Order.order_fees()
+            "cost": {"$ifNull": ["$base_cost", {"$add": [
+                {"$ifNull": ["$shopee_fee", 0]},
+                {"$ifNull": ["$shipping_fee", 0]},
+                {"$ifNull": ["$seller_coupon", 0]},
+                {"$sum": {"$map": {
+                    "input": "$products",
+                    "as": "i",
+                    "in": {"$add": [
+                        {"$multiply": ["$$i.quantity", product_field("purchase_price")]},
+                        product_field("shipping_fee"),
+                    ]},
+                }}},
+            ]}]},
+        }},
+        {"$group": {
+            "_id": {"event": "$live_selling_event_id", "status": "$status"},
+            "order_count": {"$sum": 1},
+            "revenue": {"$sum": "$revenue"},
+            "cost": {"$sum": "$cost"},
+        }},
+        # The event's ads_fee is split evenly over all of its orders, not only
+        # the ones matched by the filter
+        {"$lookup": {
+            "from": "live_selling_events",
+            "let": {"event_id": _to_object_id("$_id.event")},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$event_id"]}}},
+                {"$project": {"ads_fee": 1, "order_count": 1}},
+            ],
+            "as": "event",
+        }},
+        {"$project": {
+            "order_count": 1,
+            "revenue": 1,
+            "cost": {"$add": [
+                "$cost",
+                {"$cond": [
+                    {"$gt": [{"$size": "$event"}, 0]},
+                    {"$divide": [
+                        {"$multiply": [{"$ifNull": [{"$first": "$event.ads_fee"}, 0]}, "$order_count"]},
+                        {"$max": [{"$ifNull": [{"$first": "$event.order_count"}, 0]}, 1]},
+                    ]},
+                    0,
+                ]},
+            ]},
+        }},
+        {"$group": {
+            "_id": "$_id.status",
+            "order_count": {"$sum": "$order_count"},
+            "revenue": {"$sum": "$revenue"},
+            "cost": {"$sum": "$cost"},
+        }},
+    ]
+
+async def filtered_summary(match):
+    rows = await Order.get_motor_collection().aggregate(build_pipeline(match)).to_list(length=None)
+    revenue = sum(row["revenue"] or 0 for row in rows)
+    cost = sum(row["cost"] or 0 for row in rows)
+    inventory = await rollups.read_inventory()
+    summary = rollups.summarize(None, inventory)
+    summary.update({
+        "total_revenue": revenue,
+        "total_profit": revenue - cost,
+        "order_count": sum(row["order_count"] for row in rows),
+        "orders_by_status": {row["_id"]: row["order_count"] for row in rows},
+    })
+    return summary
+
+TOP_PRODUCTS = 5
+
+def breakdown_pipeline(match, top_n=TOP_PRODUCTS):
+    return [
+        {"$match": match},
+        {"$unionWith": {"coll": OrderArchive.get_motor_collection().name, "pipeline": archive.unwind_pipeline(match)}},
+        {"$facet": {
+            "by_day": [
+                {"$group": {"_id": "$sold_date", "revenue": {"$sum": "$revenue"}, "orders": {"$sum": 1}}},
+                {"$sort": {"_id": 1}},
+            ],
+            "by_channel": [
+                {"$group": {"_id": "$sales_channel", "revenue": {"$sum": "$revenue"}, "orders": {"$sum": 1}}},
+            ],
+            "top_products": [
+                {"$unwind": "$products"},
+                {"$group": {"_id": "$products.product_id", "quantity": {"$sum": "$products.quantity"}}},
+                {"$sort": {"quantity": -1, "_id": 1}},
+                {"$limit": top_n},
+            ],
+        }},
+    ]
+
+async def filtered_breakdown(match, top_n=TOP_PRODUCTS):
+    [result] = await Order.get_motor_collection().aggregate(breakdown_pipeline(match, top_n)).to_list(length=None)
+    return await rollups.breakdown(
+        [(row["_id"], row["revenue"], row["orders"]) for row in result["by_day"]],
+        [(row["_id"], row["revenue"], row["orders"]) for row in result["by_channel"]],
+        [(row["_id"], row["quantity"]) for row in result["top_products"]],
+    )
@@ -0,0 +1,144 @@
+import os
+from datetime import date, datetime, time, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from models.order import Order, OrderStatus
+from models.order_archive import OrderArchive
+import change_versions
+
+# Hot/cold split for orders. Delivered and cancelled orders older than
+# ARCHIVE_AFTER_DAYS move out of "orders" into per-month bucket documents in
+# "order_archive", so the hot collection and its indexes only hold recent and
+# open orders. get_order, the exports, filtered analytics and the rollup
+# rebuild read the archive too; the rollups already count archived orders.
+#
+#   python archive.py run [--older-than-days N]
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+CLOSED_STATUSES = [OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value]
+BATCH_SIZE = 1000
+# Keeps bucket documents far below MongoDB's 16MB limit
+BUCKET_SIZE = 500
+
+def _collection():
+    return OrderArchive.get_motor_collection()
+
+def _month(value: datetime):
+    return datetime(value.year, value.month, 1)
+
+def _compact(doc):
+    # Nulls and import bookkeeping aren't needed once an order is closed
+    return {k: v for k, v in doc.items() if v is not None and k not in ("import_key", "import_row")}
+
+async def archive_orders(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = BATCH_SIZE):
+    cutoff = datetime.combine(date.today() - timedelta(days=older_than_days), time.min)
+    query = {"status": {"$in": CLOSED_STATUSES}, "sold_date": {"$lt": cutoff}}
+    orders = Order.get_motor_collection()
+    archived = 0
+    while True:
+        docs = await orders.find(query).sort([("sold_date", 1), ("_id", 1)]).limit(batch_size).to_list(length=None)
+        if not docs:
+            break
+        ids = [d["_id"] for d in docs]
+        # A run that stopped between copying and deleting left copies behind; don't add them twice
+        copied = {
+            o["_id"]
+            async for bucket in _collection().find({"orders._id": {"$in": ids}}, {"orders._id": 1})
+            for o in bucket["orders"]
+        }
+        by_month = {}
+        for d in docs:
+            if d["_id"] not in copied:
+                by_month.setdefault(_month(d["sold_date"]), []).append(_compact(d))
+        ops = []
+        for month, entries in by_month.items():
+            for start in range(0, len(entries), BUCKET_SIZE):
+                chunk = entries[start:start + BUCKET_SIZE]
+                # Appends to a bucket of that month with room left, or starts a new one
+                ops.append(UpdateOne(
+                    {"month": month, "order_count": {"$lte": BUCKET_SIZE - len(chunk)}},
+                    {"$push": {"orders": {"$each": chunk}}, "$inc": {"order_count": len(chunk)}},
+                    upsert=True,
+                ))
+        if ops:
+            await _collection().bulk_write(ops, ordered=True)
+        archived += await _delete_copied(docs)
+    if archived:
+        await change_versions.bump(change_versions.ORDERS)
+    return archived
+
+async def _delete_copied(docs):
+    # Only deletes orders whose status is still the one that was copied, so a
+    # status change that landed in between isn't lost. Those orders stay hot
+    # and their archive copies are removed again.
+    orders = Order.get_motor_collection()
+    by_status = {}
+    for d in docs:
+        by_status.setdefault(d["status"], []).append(d["_id"])
+    deleted = 0
+    for status, ids in by_status.items():
+        result = await orders.delete_many({"_id": {"$in": ids}, "status": status})
+        deleted += result.deleted_count
+    if deleted < len(docs):
+        kept = [d["_id"] async for d in orders.find({"_id": {"$in": [d["_id"] for d in docs]}}, {"_id": 1})]
+        if kept:
+            await _collection().bulk_write([
+                UpdateOne({"orders._id": oid}, {"$pull": {"orders": {"_id": oid}}, "$inc": {"order_count": -1}})
+                for oid in kept
+            ], ordered=False)
+    return deleted
+
+def _bucket_match(match):
+    # Only the months a sold_date filter can reach
+    sold_date = match.get("sold_date") or {}
+    month = {}
+    if "$gte" in sold_date:
+        month["$gte"] = _month(sold_date["$gte"])
+    if "$lte" in sold_date:
+        month["$lte"] = sold_date["$lte"]
+    return {"month": month} if month else {}
+
+def unwind_pipeline(match):
+    # Archived orders as plain order documents, for $unionWith or aggregate()
+    return [
+        {"$match": _bucket_match(match)},
+        {"$unwind": "$orders"},
+        {"$replaceRoot": {"newRoot": "$orders"}},
+        {"$match": match},
+    ]
+
+def find_orders(match, projection=None, sort=None):
+    # Newest month first; order within a month is only guaranteed with sort
+    pipeline = [{"$match": _bucket_match(match)}, {"$sort": {"month": -1}}] + unwind_pipeline(match)[1:]
+    if sort:
+        pipeline.append({"$sort": dict(sort)})
+    if projection:
+        pipeline.append({"$project": projection})
+    return _collection().aggregate(pipeline, allowDiskUse=True)
+
+async def find_order(order_id):
+    if not ObjectId.is_valid(str(order_id)):
+        return None
+    oid = ObjectId(str(order_id))
+    bucket = await _collection().find_one({"orders._id": oid}, {"orders": {"$elemMatch": {"_id": oid}}})
+    if not bucket or not bucket.get("orders"):
+        return None
+    return Order.model_validate(bucket["orders"][0])
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    from database import init_db
+
+    parser = argparse.ArgumentParser(description="Move closed old orders into the monthly archive")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+
+    async def _main():
+        await init_db()
+        count = await archive_orders(args.older_than_days)
+        print(f"Archived {count} orders older than {args.older_than_days} days")
+
+    asyncio.run(_main())
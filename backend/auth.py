@@ -1,6 +1,8 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 import os
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -28,14 +30,24 @@ class User(BaseModel):
 class UserInDB(User):
     hashed_password: str
 
-# Demo user credentials (in production, this would be in a database)
+# Demo user credentials (in production, this would be in a database).
+# Hashes are precomputed so importing this module does no bcrypt work;
+# regenerate with: python -c "from auth import get_password_hash; print(get_password_hash('...'))"
 DEMO_USERS = {
     "FernSudCute": {
         "username": "FernSudCute",
-        "hashed_password": pwd_context.hash("FernJ0101")
+        "hashed_password": os.getenv(
+            "DEMO_USER_PASSWORD_HASH",
+            "$2b$12$H94gKRGqGkOu1EZaBdPNUuwiluSarvHgSFj5Nf/awdIA3JgXVoZNW",
+        ),
     }
 }
 
+# Verified tokens, so repeat requests with the same bearer token skip the
+# HMAC check. Entries are dropped once the token's exp has passed.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+_token_cache = OrderedDict()
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -65,21 +77,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _cached_token(token: str):
+    entry = _token_cache.get(token)
+    if entry is None:
+        return None
+    token_data, expires_at = entry
+    if expires_at is not None and expires_at <= time.time():
+        _token_cache.pop(token, None)
+        return None
+    _token_cache.move_to_end(token)
+    return token_data
+
 def verify_token(token: str):
+    token_data = _cached_token(token)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        token_data = TokenData(username=username)
-        return token_data
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception()
+    username: str = payload.get("sub")
+    if username is None:
+        raise _credentials_exception()
+    token_data = TokenData(username=username)
+    _token_cache[token] = (token_data, payload.get("exp"))
+    if len(_token_cache) > TOKEN_CACHE_SIZE:
+        _token_cache.popitem(last=False)
+    return token_data
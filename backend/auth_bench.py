@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import time
+import timeit
+from datetime import timedelta
+
+import auth
+
+# Measures what auth costs: python auth_bench.py [iterations]
+#   startup   - wall time of a fresh interpreter importing main (run from backend/)
+#   uncached  - verify_token with the token cache cleared before every call
+#   cached    - verify_token on a token that is already in the cache
+
+def startup_seconds(runs=3):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def verify_microseconds(iterations):
+    token = auth.create_access_token({"sub": "FernSudCute"}, expires_delta=timedelta(minutes=5))
+
+    def uncached():
+        auth._token_cache.clear()
+        auth.verify_token(token)
+
+    uncached_us = min(timeit.repeat(uncached, number=iterations, repeat=3)) / iterations * 1e6
+    auth.verify_token(token)
+    cached_us = min(timeit.repeat(lambda: auth.verify_token(token), number=iterations, repeat=3)) / iterations * 1e6
+    return uncached_us, cached_us
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"startup (import main): {startup_seconds() * 1000:.0f} ms")
+    uncached_us, cached_us = verify_microseconds(iterations)
+    print(f"verify_token uncached: {uncached_us:.1f} us/request")
+    print(f"verify_token cached:   {cached_us:.1f} us/request")
@@ -0,0 +1,48 @@
+from fastapi import Request, Response
+from pymongo import UpdateOne
+
+from models.product import Product
+
+# Per-collection change counters, kept in the cache_versions collection next
+# to the product cost cache's counter. Every write endpoint bumps the counters
+# of what it changed once the write is done; read endpoints turn the counters
+# they depend on into an ETag, so a matching If-None-Match costs one small read.
+
+PRODUCTS = "products"
+ORDERS = "orders"
+LIVE_EVENTS = "live_events"
+ROLLUPS = "rollups"
+
+# Everything /analytics/ is computed from
+ANALYTICS = (PRODUCTS, ORDERS, LIVE_EVENTS, ROLLUPS)
+
+def _collection():
+    return Product.get_motor_collection().database["cache_versions"]
+
+async def bump(*names):
+    await _collection().bulk_write(
+        [UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in names],
+        ordered=False,
+    )
+
+async def read(*names):
+    versions = {name: 0 for name in names}
+    async for doc in _collection().find({"_id": {"$in": list(names)}}):
+        versions[doc["_id"]] = doc.get("version", 0)
+    return versions
+
+async def check(request: Request, *names, extra=None):
+    # Returns (etag, response); response is a 304 when the client already has this version.
+    # extra is folded into the tag for responses that also change without a write.
+    versions = await read(*names)
+    parts = [f"{name}.{versions[name]}" for name in names] + ([extra] if extra else [])
+    etag = 'W/"' + "-".join(parts) + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return etag, Response(status_code=304, headers=headers)
+    return etag, None
+
+def tag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
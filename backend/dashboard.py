@@ -0,0 +1,79 @@
+import asyncio
+from datetime import date, datetime, time
+from fastapi import HTTPException
+
+from models.product import Product
+from models.order import Order
+from models.live_event import LiveSellingEvent
+import pagination
+import rollups
+import rows
+
+# GET /dashboard: everything the Dashboard page shows, with each section's
+# queries running concurrently. Sections are picked with ?fields=. Each
+# section gets the request's rollup summary, read once however many
+# sections use it.
+
+LOW_STOCK_THRESHOLD = 3
+LOW_STOCK_LIMIT = 50
+RECENT_LIMIT = 5
+UPCOMING_EVENTS_LIMIT = 5
+
+async def _analytics(rollup):
+    return await rollup
+
+async def _counts(rollup):
+    # The rollup total also counts archived orders
+    products, summary = await asyncio.gather(
+        Product.get_motor_collection().estimated_document_count(),
+        rollup,
+    )
+    return {"products": products, "orders": summary["order_count"]}
+
+async def _low_stock(rollup):
+    cursor = Product.get_motor_collection().find(
+        {"remaining_quantity": {"$lte": LOW_STOCK_THRESHOLD}}, rows.PRODUCT_PROJECTION,
+    ).sort([("remaining_quantity", 1), ("_id", 1)]).limit(LOW_STOCK_LIMIT)
+    return [rows.product_row(d) for d in await cursor.to_list(length=None)]
+
+async def _recent_orders(rollup):
+    docs = await Order.get_motor_collection().find({}, rows.ORDER_PROJECTION).sort(pagination.ORDER_SORT).limit(RECENT_LIMIT).to_list(length=None)
+    return await rows.order_rows(docs)
+
+async def _recent_products(rollup):
+    docs = await Product.get_motor_collection().find({}, rows.PRODUCT_PROJECTION).sort("_id", -1).limit(RECENT_LIMIT).to_list(length=None)
+    return [rows.product_row(d) for d in docs]
+
+async def _upcoming_events(rollup):
+    # event_date is stored as a datetime by the BSON encoder
+    today = datetime.combine(date.today(), time.min)
+    docs = await LiveSellingEvent.get_motor_collection().find(
+        {"event_date": {"$gte": today}}, rows.EVENT_PROJECTION,
+    ).sort([("event_date", 1), ("_id", 1)]).limit(UPCOMING_EVENTS_LIMIT).to_list(length=None)
+    return [rows.event_row(d) for d in docs]
+
+SECTIONS = {
+    "analytics": _analytics,
+    "counts": _counts,
+    "low_stock": _low_stock,
+    "recent_orders": _recent_orders,
+    "recent_products": _recent_products,
+    "upcoming_events": _upcoming_events,
+}
+
+def parse_fields(fields):
+    if not fields:
+        return list(SECTIONS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dashboard field {unknown[0]}; expected some of {', '.join(SECTIONS)}")
+    return list(dict.fromkeys(names))
+
+ROLLUP_SECTIONS = {"analytics", "counts"}
+
+async def summary(names):
+    # A task can be awaited by several sections and only runs once
+    rollup = asyncio.ensure_future(rollups.read_summary()) if ROLLUP_SECTIONS.intersection(names) else None
+    results = await asyncio.gather(*(SECTIONS[name](rollup) for name in names))
+    return dict(zip(names, results))
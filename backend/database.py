@@ -1,14 +1,58 @@
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from db_stats import QueryStatsListener
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://mongo:27017/product_tracking")
 
 # Call this in FastAPI startup event
-async def init_db():
+async def init_db(database=None, allow_index_dropping=False):
     from models.product import Product
     from models.order import Order
     from models.live_event import LiveSellingEvent
-    client = AsyncIOMotorClient(MONGODB_URL)
-    await init_beanie(database=client.get_default_database(), document_models=[Product, Order, LiveSellingEvent])
+    from models.analytics_rollup import AnalyticsRollup
+    from models.import_batch import ImportBatch
+    from models.order_archive import OrderArchive
+    from models.inventory_movement import InventoryMovement
+    from models.inventory_snapshot import InventorySnapshot
+    from models.inventory_position import InventoryPosition
+    if database is None:
+        client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[QueryStatsListener()])
+        database = client.get_default_database()
+    # Creates the indexes declared in each model's Settings. Undeclared ones,
+    # including any an operator added by hand, are only dropped on request
+    # (python database.py indexes --drop-undeclared)
+    await init_beanie(
+        database=database,
+        document_models=[Product, Order, LiveSellingEvent, AnalyticsRollup, ImportBatch, OrderArchive, InventoryMovement, InventorySnapshot, InventoryPosition],
+        allow_index_dropping=allow_index_dropping,
+    )
+
+async def _index_names(database):
+    names = {}
+    for collection in await database.list_collection_names():
+        names[collection] = set(await database[collection].index_information())
+    return names
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Create the declared indexes, and optionally drop the rest")
+    parser.add_argument("command", choices=["indexes"])
+    parser.add_argument("--drop-undeclared", action="store_true", help="Also drop indexes no model declares")
+    args = parser.parse_args()
+
+    async def _main():
+        database = AsyncIOMotorClient(MONGODB_URL).get_default_database()
+        before = await _index_names(database)
+        await init_db(database, allow_index_dropping=args.drop_undeclared)
+        after = await _index_names(database)
+        for collection in sorted(after):
+            for name in sorted(after[collection] - before.get(collection, set())):
+                print(f"created {collection}.{name}")
+            for name in sorted(before.get(collection, set()) - after[collection]):
+                print(f"dropped {collection}.{name}")
+
+    asyncio.run(_main())
 
@@ -0,0 +1,49 @@
+import contextvars
+import threading
+from pymongo import monitoring
+
+# Per-request MongoDB command counting. Motor runs commands on a thread pool
+# but copies the caller's context, so the listener sees the request's stats.
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self._lock = threading.Lock()
+
+    def record_start(self):
+        with self._lock:
+            self.count += 1
+
+    def record_end(self, duration_micros):
+        with self._lock:
+            self.duration += duration_micros / 1_000_000
+
+_current_stats = contextvars.ContextVar("query_stats", default=None)
+
+def begin_request():
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    return stats, token
+
+def end_request(token):
+    _current_stats.reset(token)
+
+def current_stats():
+    return _current_stats.get()
+
+class QueryStatsListener(monitoring.CommandListener):
+    def started(self, event):
+        stats = _current_stats.get()
+        if stats:
+            stats.record_start()
+
+    def succeeded(self, event):
+        stats = _current_stats.get()
+        if stats:
+            stats.record_end(event.duration_micros)
+
+    def failed(self, event):
+        stats = _current_stats.get()
+        if stats:
+            stats.record_end(event.duration_micros)
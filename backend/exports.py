@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from models.product import Product
+from models.order import Order
+import archive
+import pagination
+import rows
+
+# Streaming exports: rows are read from a Motor cursor in fixed-size batches
+# and written out one batch at a time, so memory stays flat for any export size.
+
+BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _csv_value(value):
+    if isinstance(value, list):
+        # Order line items as product_id:quantity pairs
+        return ";".join(f"{i['product_id']}:{i['quantity']}" for i in value)
+    return "" if value is None else value
+
+async def _stream(cursor, to_row, fields, fmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+    count = 0
+    async for doc in cursor:
+        row = to_row(doc)
+        if fmt == "csv":
+            writer.writerow([_csv_value(row[f]) for f in fields])
+        else:
+            buffer.write(json.dumps(row, default=str))
+            buffer.write("\n")
+        count += 1
+        if count % BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def _next(cursor):
+    try:
+        return await cursor.__anext__()
+    except StopAsyncIteration:
+        return None
+
+async def _merge(key, first, second):
+    # Merges two cursors that are both sorted descending by key
+    a, b = await _next(first), await _next(second)
+    while a is not None or b is not None:
+        if b is None or (a is not None and key(a) >= key(b)):
+            yield a
+            a = await _next(first)
+        else:
+            yield b
+            b = await _next(second)
+
+def _order_key(doc):
+    # MongoDB sorts a missing sold_date below every date
+    sold_date = doc.get("sold_date")
+    return (sold_date is not None, sold_date or datetime.min, doc["_id"])
+
+async def stream_orders(query, fmt="csv"):
+    # Events are few; load every event's ads_fee share once per export
+    ads_fee_shares = await rows.ads_fee_shares()
+    hot = Order.get_motor_collection().find(query, rows.ORDER_PROJECTION).sort(pagination.ORDER_SORT).batch_size(BATCH_SIZE)
+    # Closed orders are archived by age, but open ones can be older still, so
+    # the two streams are merged rather than appended
+    cold = archive.find_orders(query, rows.ORDER_PROJECTION, sort=pagination.ORDER_SORT)
+    cursor = _merge(_order_key, hot, cold)
+    async for chunk in _stream(cursor, lambda doc: rows.order_row(doc, ads_fee_shares), rows.ORDER_FIELDS, fmt):
+        yield chunk
+
+async def stream_products(query, fmt="csv"):
+    cursor = Product.get_motor_collection().find(query, rows.PRODUCT_PROJECTION).sort(pagination.PRODUCT_SORT).batch_size(BATCH_SIZE)
+    async for chunk in _stream(cursor, rows.product_row, rows.PRODUCT_FIELDS, fmt):
+        yield chunk
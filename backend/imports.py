@@ -0,0 +1,249 @@
+import codecs
+import csv
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+from bson import ObjectId
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from models.order import Order, OrderStatus
+from models.schemas import OrderCreate
+from models.import_batch import ImportBatch
+import inventory
+import inventory_ledger
+import live_events
+import rollups
+import change_versions
+from product_cache import product_costs
+
+# Bulk order ingestion (e.g. Shopee order reports). Rows are parsed from the
+# streamed upload, stock for the whole batch is reserved in one bulk write,
+# orders go in with one insert_many and each live event is updated once.
+
+MAX_RESERVE_ATTEMPTS = 3
+STALE_IMPORT_AFTER = timedelta(minutes=10)
+
+async def _lines(stream):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+def _parse_products(value):
+    # Same product_id:quantity;... format as /orders/export
+    items = []
+    for part in value.split(";"):
+        if part.strip():
+            product_id, _, quantity = part.partition(":")
+            items.append({"product_id": product_id.strip(), "quantity": quantity.strip()})
+    return items
+
+async def parse_rows(stream, fmt):
+    # Yields (row_number, raw_row, error); row numbers count data rows from 1
+    header = None
+    row_number = 0
+    async for line in _lines(stream):
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [h.strip() for h in values]
+                continue
+            row_number += 1
+            raw = {k: v for k, v in zip(header, values) if v != ""}
+            if "products" in raw:
+                raw["products"] = _parse_products(raw["products"])
+        else:
+            row_number += 1
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(raw, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+        yield row_number, raw, None
+
+def validation_message(exc: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+def _is_cancelled(order):
+    return order.status == OrderStatus.CANCELLED.value
+
+async def _reserve_batch(rows, product_lookup, token):
+    rejected = []
+    for _ in range(MAX_RESERVE_ATTEMPTS):
+        quantities = inventory.quantities_by_product(item for _, o in rows for item in o.products)
+        if await inventory.try_reserve(quantities, token):
+            return rows, quantities, rejected
+        # Not enough stock for everything: keep the rows, in upload order, that fit current stock
+        current = await inventory.fetch_products(quantities)
+        stock = {pid: p.remaining_quantity for pid, p in current.items()}
+        fitting = []
+        for row_number, order in rows:
+            needed = inventory.quantities_by_product(order.products)
+            short = [pid for pid, qty in needed.items() if stock.get(pid, 0) < qty]
+            if short:
+                rejected.append({"row": row_number, "error": f"Not enough stock for product {product_lookup[short[0]].name}"})
+                continue
+            for pid, qty in needed.items():
+                stock[pid] -= qty
+            fitting.append((row_number, order))
+        rows = fitting
+    rejected += [{"row": n, "error": "Stock changed while importing, please retry"} for n, _ in rows]
+    return [], {}, rejected
+
+async def _insert_orders(numbered):
+    # Unordered, so one rejected row doesn't stop the rows after it. Returns
+    # the written docs and an error for each row that wasn't written.
+    try:
+        await Order.insert_many([doc for _, doc in numbered], ordered=False)
+        return [doc for _, doc in numbered], []
+    except BulkWriteError as exc:
+        write_errors = {e["index"]: e for e in exc.details["writeErrors"]}
+    written, errors = [], []
+    for index, (row_number, doc) in enumerate(numbered):
+        error = write_errors.get(index)
+        if error is None:
+            written.append(doc)
+        elif error.get("code") == 11000 and "import_key" in error.get("errmsg", ""):
+            errors.append({"row": row_number, "error": "Already imported by a concurrent upload"})
+        else:
+            errors.append({"row": row_number, "error": error.get("errmsg", "Insert failed")})
+    return written, errors
+
+async def _settle(numbered, docs, reserved, token, events, event_counts, product_lookup):
+    # Rows that weren't written give back their stock and event counts; the
+    # written ones (docs) keep theirs and are recorded
+    if not docs:
+        await inventory.release_stock(reserved, token)
+    else:
+        written = {doc.id for doc in docs}
+        failed = [doc for _, doc in numbered if doc.id not in written]
+        await inventory.return_stock(inventory.quantities_by_product(item for doc in failed if not _is_cancelled(doc) for item in doc.products))
+        await inventory.confirm_stock(reserved, token)
+    kept = Counter(d.live_selling_event_id for d in docs if d.live_selling_event_id)
+    for event_id in events:
+        if event_counts[event_id] > kept[event_id]:
+            await live_events.remove_order(event_id, event_counts[event_id] - kept[event_id])
+    await inventory_ledger.record_sales([doc for doc in docs if not _is_cancelled(doc)])
+    await rollups.record_orders(docs, product_lookup, events)
+    if docs:
+        changed = [change_versions.ORDERS, change_versions.PRODUCTS] + ([change_versions.LIVE_EVENTS] if events else [])
+        await change_versions.bump(*changed)
+
+async def _import(stream, fmt, key):
+    errors = []
+    valid = []
+    async for row_number, raw, error in parse_rows(stream, fmt):
+        if error:
+            errors.append({"row": row_number, "error": error})
+            continue
+        try:
+            valid.append((row_number, OrderCreate(**raw)))
+        except ValidationError as exc:
+            errors.append({"row": row_number, "error": validation_message(exc)})
+
+    imported = set()
+    if key:
+        # Resuming an interrupted upload: skip rows that already made it in
+        imported = {
+            doc["import_row"]
+            async for doc in Order.get_motor_collection().find({"import_key": key}, {"import_row": 1})
+        }
+        valid = [(n, o) for n, o in valid if n not in imported]
+
+    product_lookup = await product_costs.get_many(item.product_id for _, o in valid for item in o.products)
+    known = []
+    for row_number, order in valid:
+        missing = [item.product_id for item in order.products if item.product_id not in product_lookup]
+        if missing:
+            errors.append({"row": row_number, "error": f"Product {missing[0]} not found"})
+        else:
+            known.append((row_number, order))
+
+    token = f"import:{key or ObjectId()}"
+    # Rows imported as cancelled take no stock unless they are un-cancelled later
+    cancelled = [(n, o) for n, o in known if _is_cancelled(o)]
+    accepted, reserved, rejected = await _reserve_batch([(n, o) for n, o in known if not _is_cancelled(o)], product_lookup, token)
+    accepted = sorted(accepted + cancelled, key=lambda row: row[0])
+    errors += rejected
+
+    # One order_count update per live event for the whole batch
+    event_counts = Counter(o.live_selling_event_id for _, o in accepted if o.live_selling_event_id)
+    events = {}
+    numbered = []
+    try:
+        for event_id, count in event_counts.items():
+            event = await live_events.add_order(event_id, count)
+            if event:
+                events[event_id] = event
+        for row_number, order in accepted:
+            doc = Order(**order.dict(), import_key=key, import_row=row_number if key else None)
+            doc.id = PydanticObjectId()
+            await doc.calculate_profit_and_cost(product_lookup=product_lookup, ads_fee=doc.ads_fee_share(events.get(doc.live_selling_event_id)))
+            numbered.append((row_number, doc))
+        docs, insert_errors = await _insert_orders(numbered) if numbered else ([], [])
+    except Exception:
+        # The insert may have got part of the way; whatever is in stays and
+        # is recorded, the rest gives back its stock and event counts
+        ids = [doc.id for _, doc in numbered]
+        stored = {d["_id"] async for d in Order.get_motor_collection().find({"_id": {"$in": ids}}, {"_id": 1})} if ids else set()
+        docs = [doc for _, doc in numbered if doc.id in stored]
+        await _settle(numbered, docs, reserved, token, events, event_counts, product_lookup)
+        raise
+    errors += insert_errors
+    await _settle(numbered, docs, reserved, token, events, event_counts, product_lookup)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "imported": len(docs),
+        "already_imported": len(imported),
+        "order_ids": [str(d.id) for d in docs],
+        "errors": errors,
+    }
+
+async def import_orders(stream, fmt="csv", idempotency_key=None):
+    if not idempotency_key:
+        return await _import(stream, fmt, None)
+
+    batch = await ImportBatch.find_one({"key": idempotency_key})
+    if batch and batch.status == "completed":
+        return batch.result
+    if batch and batch.status == "running" and datetime.utcnow() - batch.created_at < STALE_IMPORT_AFTER:
+        raise HTTPException(status_code=409, detail="An import with this Idempotency-Key is already running")
+    if batch:
+        # A failed or abandoned attempt; take it over and resume
+        batch.status = "running"
+        batch.created_at = datetime.utcnow()
+        await batch.save()
+    else:
+        batch = ImportBatch(key=idempotency_key)
+        try:
+            await batch.insert()
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="An import with this Idempotency-Key is already running")
+
+    try:
+        result = await _import(stream, fmt, idempotency_key)
+    except Exception:
+        batch.status = "failed"
+        await batch.save()
+        raise
+    batch.status = "completed"
+    batch.result = result
+    await batch.save()
+    return result
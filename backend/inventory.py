@@ -0,0 +1,82 @@
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from models.product import Product
+
+# Stock is reserved with conditional $inc updates so concurrent orders can't
+# oversell. Each reservation tags the product with a token (the order id) so a
+# partially applied batch can be undone exactly.
+
+def quantities_by_product(items):
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+async def reserve_stock(items, token: str):
+    quantities = quantities_by_product(items)
+    invalid = [pid for pid in quantities if not ObjectId.is_valid(pid)]
+    if invalid:
+        raise HTTPException(status_code=404, detail=f"Product {invalid[0]} not found")
+    if await try_reserve(quantities, token):
+        return quantities
+    collection = Product.get_motor_collection()
+    # Work out which line failed for the error message
+    found = {}
+    async for doc in collection.find({"_id": {"$in": [ObjectId(pid) for pid in quantities]}}, {"name": 1, "remaining_quantity": 1}):
+        found[str(doc["_id"])] = doc
+    for pid, qty in quantities.items():
+        if pid not in found:
+            raise HTTPException(status_code=404, detail=f"Product {pid} not found")
+    for pid, qty in quantities.items():
+        if found[pid].get("remaining_quantity", 0) < qty:
+            raise HTTPException(status_code=400, detail=f"Not enough stock for product {found[pid].get('name')}")
+    raise HTTPException(status_code=409, detail="Stock changed while reserving, please retry")
+
+async def try_reserve(quantities, token: str):
+    # All-or-nothing: returns False, with nothing decremented, if any product lacks stock
+    if not quantities:
+        return True
+    ops = [
+        UpdateOne(
+            {"_id": ObjectId(pid), "remaining_quantity": {"$gte": qty}},
+            {"$inc": {"remaining_quantity": -qty}, "$push": {"pending_reservations": token}},
+        )
+        for pid, qty in quantities.items()
+    ]
+    result = await Product.get_motor_collection().bulk_write(ops, ordered=False)
+    if result.modified_count == len(ops):
+        return True
+    await release_stock(quantities, token)
+    return False
+
+async def release_stock(quantities, token: str):
+    # Only products that still carry the token had their stock decremented
+    ops = [
+        UpdateOne(
+            {"_id": ObjectId(pid), "pending_reservations": token},
+            {"$inc": {"remaining_quantity": qty}, "$pull": {"pending_reservations": token}},
+        )
+        for pid, qty in quantities.items()
+    ]
+    if ops:
+        await Product.get_motor_collection().bulk_write(ops, ordered=False)
+
+async def return_stock(quantities):
+    # Units coming back from a cancelled order
+    ops = [UpdateOne({"_id": ObjectId(pid)}, {"$inc": {"remaining_quantity": qty}}) for pid, qty in quantities.items() if ObjectId.is_valid(pid)]
+    if ops:
+        await Product.get_motor_collection().bulk_write(ops, ordered=False)
+
+async def confirm_stock(quantities, token: str):
+    await Product.get_motor_collection().update_many(
+        {"_id": {"$in": [ObjectId(pid) for pid in quantities]}},
+        {"$pull": {"pending_reservations": token}},
+    )
+
+async def fetch_products(product_ids):
+    # One $in query for just the products an order references
+    ids = [ObjectId(pid) for pid in set(product_ids) if ObjectId.is_valid(pid)]
+    products = await Product.find({"_id": {"$in": ids}}).to_list()
+    return {str(p.id): p for p in products}
@@ -0,0 +1,269 @@
+import asyncio
+import os
+from datetime import date, datetime, time
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models.product import Product
+from models.inventory_movement import InventoryMovement
+from models.inventory_snapshot import InventorySnapshot
+from models.inventory_position import InventoryPosition
+import rollups
+
+# Append-only ledger of stock movements plus periodic per-product snapshots.
+# Stock is held as FIFO layers (sales use up the oldest units first), so a
+# product's position at any time is its latest snapshot replayed with the
+# movements since, and the age of the units in stock comes from when they
+# actually arrived. Each product's current layers are also kept in
+# inventory_positions, and their totals in the inventory rollup, so the
+# current average age costs no ledger reads.
+#
+#   python inventory_ledger.py snapshot    take a snapshot run
+#   python inventory_ledger.py positions   recompute the current positions
+
+SNAPSHOT_KEEP_DAYS = int(os.getenv("INVENTORY_SNAPSHOT_KEEP_DAYS", "90"))
+
+def _movements():
+    return InventoryMovement.get_motor_collection()
+
+def _snapshots():
+    return InventorySnapshot.get_motor_collection()
+
+def _positions():
+    return InventoryPosition.get_motor_collection()
+
+async def record(product_quantities, reason: str, order_id=None, sign: int = 1):
+    # product_quantities maps product_id -> units; sign=-1 for stock going out
+    at = datetime.utcnow()
+    docs = [
+        {"product_id": pid, "delta": sign * qty, "reason": reason, "order_id": order_id, "at": at}
+        for pid, qty in product_quantities.items() if qty
+    ]
+    if docs:
+        await _movements().insert_many(docs)
+        await _apply(docs)
+
+async def record_sales(orders):
+    # One movement per order line, for a single order or an import batch
+    at = datetime.utcnow()
+    docs = [
+        {"product_id": item.product_id, "delta": -item.quantity, "reason": "sale", "order_id": str(order.id), "at": at}
+        for order in orders for item in order.products
+    ]
+    if docs:
+        await _movements().insert_many(docs)
+        await _apply(docs)
+
+def replay(layers, movements):
+    layers = [dict(layer) for layer in layers]
+    for m in movements:
+        if m["delta"] > 0:
+            # Returned units from a cancellation count as arriving again
+            layers.append({"received": m["at"], "units": m["delta"]})
+            continue
+        remaining = -m["delta"]
+        while remaining and layers:
+            used = min(remaining, layers[0]["units"])
+            layers[0]["units"] -= used
+            remaining -= used
+            if not layers[0]["units"]:
+                layers.pop(0)
+    return layers
+
+def _received_ordinal_sum(layers):
+    return sum(layer["units"] * layer["received"].toordinal() for layer in layers)
+
+def _average_age(layers, on: date):
+    units = sum(layer["units"] for layer in layers)
+    if not units:
+        return 0.0
+    return on.toordinal() - _received_ordinal_sum(layers) / units
+
+def _opening_layers(product, moves, at):
+    # Stock from before the ledger existed: one opening layer dated at registration
+    if product is None or any(m["reason"] == "initial" for m in moves):
+        return []
+    opening = (product.get("remaining_quantity") or 0) - sum(m["delta"] for m in moves)
+    return [{"received": product.get("registration_date") or at, "units": opening}] if opening > 0 else []
+
+def _replayed_position(moves, position, product):
+    # The position's new fields and its (units, received ordinal sum) change
+    layers = position["layers"] if position else _opening_layers(product, moves, moves[0]["at"])
+    before = (position["quantity"], position["received_ordinal_sum"]) if position else (0, 0)
+    layers = replay(layers, moves)
+    after = (sum(layer["units"] for layer in layers), _received_ordinal_sum(layers))
+    fields = {"quantity": after[0], "layers": layers, "received_ordinal_sum": after[1]}
+    return fields, (after[0] - before[0], after[1] - before[1])
+
+async def _apply(movements):
+    grouped = {}
+    for m in movements:
+        grouped.setdefault(m["product_id"], []).append(m)
+    positions = {p["product_id"]: p async for p in _positions().find({"product_id": {"$in": list(grouped)}})}
+    new = [ObjectId(pid) for pid in grouped if pid not in positions and ObjectId.is_valid(pid)]
+    products = {}
+    if new:
+        cursor = Product.get_motor_collection().find({"_id": {"$in": new}}, {"remaining_quantity": 1, "registration_date": 1})
+        products = {str(p["_id"]): p async for p in cursor}
+    units = ordinal_sum = 0
+    pending = list(grouped)
+    while pending:
+        # One bulk write for the batch. Each update only matches the version it
+        # was replayed onto (no version for a new position); if another
+        # movement got there first, the upsert collides with the unique
+        # product_id and only those products are replayed again.
+        ops, changes = [], []
+        for pid in pending:
+            position = positions.get(pid)
+            fields, change = _replayed_position(grouped[pid], position, products.get(pid))
+            version = position["version"] if position else None
+            ops.append(UpdateOne(
+                {"product_id": pid, "version": version},
+                {"$set": {**fields, "version": 0 if version is None else version + 1}},
+                upsert=True,
+            ))
+            changes.append(change)
+        try:
+            await _positions().bulk_write(ops, ordered=False)
+            failed = set()
+        except BulkWriteError as exc:
+            if any(e.get("code") != 11000 for e in exc.details["writeErrors"]):
+                raise
+            failed = {e["index"] for e in exc.details["writeErrors"]}
+        for index, (unit_change, ordinal_change) in enumerate(changes):
+            if index not in failed:
+                units += unit_change
+                ordinal_sum += ordinal_change
+        pending = [pending[index] for index in sorted(failed)]
+        if pending:
+            positions.update({p["product_id"]: p async for p in _positions().find({"product_id": {"$in": pending}})})
+    if units or ordinal_sum:
+        await rollups.record_stock_change(units, ordinal_sum)
+
+async def _movements_between(product_ids, after, until):
+    query = {"at": {"$lte": until}}
+    if after is not None:
+        query["at"]["$gt"] = after
+    if product_ids is not None:
+        query["product_id"] = {"$in": list(product_ids)}
+    grouped = {}
+    async for m in _movements().find(query).sort([("at", 1), ("_id", 1)]):
+        grouped.setdefault(m["product_id"], []).append(m)
+    return grouped
+
+async def position(product_id: str, at: datetime):
+    # Quantity (and FIFO layers, when known) of one product at a point in time
+    before = await _snapshots().find_one({"product_id": product_id, "at": {"$lte": at}}, sort=[("at", -1)])
+    if before:
+        moves = (await _movements_between([product_id], before["at"], at)).get(product_id, [])
+        layers = replay(before["layers"], moves)
+        return sum(layer["units"] for layer in layers), layers
+    # Earlier than any snapshot: work back from the next one, or from current stock
+    after = await _snapshots().find_one({"product_id": product_id, "at": {"$gt": at}}, sort=[("at", 1)])
+    if after:
+        until, quantity = after["at"], after["quantity"]
+    else:
+        product = await Product.get_motor_collection().find_one({"_id": ObjectId(product_id)}, {"remaining_quantity": 1})
+        if not product:
+            return None, None
+        until, quantity = datetime.utcnow(), product.get("remaining_quantity") or 0
+    moves = (await _movements_between([product_id], at, until)).get(product_id, [])
+    return quantity - sum(m["delta"] for m in moves), None
+
+async def stock_at(product_id: str, at: datetime):
+    quantity, layers = await position(product_id, at)
+    if quantity is None:
+        return None
+    return {
+        "product_id": product_id,
+        "at": at,
+        "quantity": quantity,
+        "average_days_in_inventory": _average_age(layers, at.date()) if layers is not None else None,
+    }
+
+async def _latest_run():
+    return await _snapshots().find_one({"product_id": None}, sort=[("at", -1)])
+
+async def _replayed(at):
+    # Every product's layers at `at`: the last snapshot run replayed with the movements since
+    run = await _latest_run()
+    since = run["at"] if run else None
+    previous = {}
+    if run:
+        async for snap in _snapshots().find({"product_id": {"$ne": None}, "at": since}, {"product_id": 1, "layers": 1}):
+            previous[snap["product_id"]] = snap["layers"]
+    moved = await _movements_between(None, since, at)
+    async for product in Product.get_motor_collection().find({}, {"remaining_quantity": 1, "registration_date": 1}):
+        pid = str(product["_id"])
+        moves = moved.get(pid, [])
+        layers = previous.get(pid)
+        if layers is None:
+            layers = _opening_layers(product, moves, at)
+        yield pid, replay(layers, moves)
+
+async def take_snapshots(at: datetime = None, keep_days: int = SNAPSHOT_KEEP_DAYS):
+    at = at or datetime.utcnow()
+    docs = []
+    total_units = 0
+    total_ordinal_sum = 0
+    async for pid, layers in _replayed(at):
+        quantity = sum(layer["units"] for layer in layers)
+        ordinal_sum = _received_ordinal_sum(layers)
+        docs.append({"product_id": pid, "at": at, "quantity": quantity, "layers": layers, "received_ordinal_sum": ordinal_sum})
+        total_units += quantity
+        total_ordinal_sum += ordinal_sum
+        if len(docs) >= 1000:
+            await _snapshots().insert_many(docs)
+            docs = []
+    if docs:
+        await _snapshots().insert_many(docs)
+    # The totals document goes in last; readers only use complete runs
+    await _snapshots().insert_one({"product_id": None, "at": at, "quantity": total_units, "received_ordinal_sum": total_ordinal_sum})
+
+    # Older per-product snapshots can go: point-in-time reads work back from a later one
+    cutoff = datetime.combine(date.fromordinal(at.date().toordinal() - keep_days), time.min)
+    await _snapshots().delete_many({"at": {"$lt": cutoff}})
+    return total_units
+
+async def build_positions():
+    # Recomputes every position and the rollup totals from the ledger. Runs
+    # once at startup when the totals are missing, and from rollups.rebuild;
+    # like that, run it when writes are quiet.
+    at = datetime.utcnow()
+    ops = []
+    units = 0
+    ordinal_sum = 0
+    async for pid, layers in _replayed(at):
+        fields = {"quantity": sum(layer["units"] for layer in layers), "layers": layers, "received_ordinal_sum": _received_ordinal_sum(layers)}
+        ops.append(UpdateOne({"product_id": pid}, {"$set": fields, "$inc": {"version": 1}}, upsert=True))
+        units += fields["quantity"]
+        ordinal_sum += fields["received_ordinal_sum"]
+        if len(ops) >= 1000:
+            await _positions().bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await _positions().bulk_write(ops, ordered=False)
+    await rollups.set_stock_totals(units, ordinal_sum)
+    return units
+
+async def ensure_positions():
+    if not await rollups.has_stock_totals():
+        await build_positions()
+
+if __name__ == "__main__":
+    import sys
+    from database import init_db
+
+    async def _main(command):
+        await init_db()
+        if command == "snapshot":
+            units = await take_snapshots()
+            print(f"Snapshot taken: {units} units in stock")
+        else:
+            units = await build_positions()
+            print(f"Positions rebuilt: {units} units in stock")
+
+    if sys.argv[1:] not in (["snapshot"], ["positions"]):
+        sys.exit("usage: python inventory_ledger.py snapshot|positions")
+    asyncio.run(_main(sys.argv[1]))
@@ -0,0 +1,58 @@
+from bson import ObjectId
+from beanie.odm.queries.update import UpdateResponse
+
+from models.live_event import LiveSellingEvent
+from models.order import Order
+
+# Each event keeps a running order_count so an order's ads_fee share can be
+# derived on read, instead of re-saving every linked order on each new sale.
+
+async def add_order(event_id: str, count: int = 1):
+    if not ObjectId.is_valid(event_id):
+        return None
+    event = await _inc_order_count(event_id, count)
+    if event is None and await LiveSellingEvent.find_one({"_id": ObjectId(event_id)}):
+        # Event created before order_count existed and not yet backfilled
+        await _seed_order_count(event_id)
+        event = await _inc_order_count(event_id, count)
+    return event
+
+async def backfill_order_counts():
+    # Events created before order_count existed; cheap once they're all set.
+    # /analytics/ reads order_count only, so run at startup.
+    cursor = LiveSellingEvent.get_motor_collection().find({"order_count": {"$exists": False}}, {"_id": 1})
+    async for doc in cursor:
+        await _seed_order_count(str(doc["_id"]))
+
+async def _seed_order_count(event_id: str):
+    import archive
+
+    linked = await Order.find({"live_selling_event_id": event_id}).count()
+    linked += len(await archive.find_orders({"live_selling_event_id": event_id}, {"_id": 1}).to_list(length=None))
+    await LiveSellingEvent.get_motor_collection().update_one(
+        {"_id": ObjectId(event_id), "order_count": {"$exists": False}},
+        {"$set": {"order_count": linked}},
+    )
+
+async def remove_order(event_id: str, count: int = 1):
+    await _inc_order_count(event_id, -count)
+
+async def _inc_order_count(event_id: str, amount: int):
+    return await LiveSellingEvent.find_one(
+        {"_id": ObjectId(event_id), "order_count": {"$exists": True}}
+    ).update({"$inc": {"order_count": amount}}, response_type=UpdateResponse.NEW_DOCUMENT)
+
+async def event_lookup(orders):
+    event_ids = {o.live_selling_event_id for o in orders if o.live_selling_event_id}
+    ids = [ObjectId(eid) for eid in event_ids if ObjectId.is_valid(eid)]
+    if not ids:
+        return {}
+    events = await LiveSellingEvent.find({"_id": {"$in": ids}}).to_list()
+    return {str(e.id): e for e in events}
+
+async def with_current_ads_fees(orders):
+    # Recompute total_cost/profit with each event's current ads_fee split
+    events = await event_lookup(orders)
+    for o in orders:
+        o.apply_ads_fee(o.ads_fee_share(events.get(o.live_selling_event_id)))
+    return orders
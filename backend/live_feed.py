@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+from bson import ObjectId
+
+from models.product import Product
+from models.schemas import OrderResponse, LiveSellingEventResponse
+
+# In-process fan-out of compact change messages to /live_feed subscribers as
+# Server-Sent Events. publish() never waits on a client: each subscriber has a
+# bounded queue, and one that falls behind has its backlog dropped and gets a
+# single "resync" message telling it to refetch, so a slow browser can't stall
+# the writers. Each worker only sees the writes it handles itself.
+
+QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "100"))
+HEARTBEAT_SECONDS = 15
+
+RESYNC_FRAME = "event: resync\ndata: {}\n\n"
+
+def _frame(message_type, data):
+    return f"event: {message_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class LiveFeed:
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.published = 0
+        self.resyncs = 0
+
+    def publish(self, message_type, data):
+        if not self.subscribers:
+            return
+        # Serialized once, shared by every subscriber
+        frame = _frame(message_type, data)
+        self.published += 1
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_FRAME)
+                self.resyncs += 1
+
+    async def stream(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            # Browsers reconnect after 3s; the page should refetch on "resync"
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle stream
+                    yield ": ping\n\n"
+        finally:
+            self.subscribers.discard(queue)
+
+    def render_metrics(self):
+        return (
+            "# HELP live_feed_subscribers Open /live_feed streams.\n"
+            "# TYPE live_feed_subscribers gauge\n"
+            f"live_feed_subscribers {len(self.subscribers)}\n"
+            "# HELP live_feed_messages_total Messages published to /live_feed.\n"
+            "# TYPE live_feed_messages_total counter\n"
+            f"live_feed_messages_total {self.published}\n"
+            "# HELP live_feed_resyncs_total Times a slow subscriber's backlog was dropped.\n"
+            "# TYPE live_feed_resyncs_total counter\n"
+            f"live_feed_resyncs_total {self.resyncs}\n"
+        )
+
+feed = LiveFeed()
+
+async def order_created(order, quantities, event=None):
+    if not feed.subscribers:
+        return
+    feed.publish("order_created", OrderResponse.from_order(order).dict())
+    await stock_changed(quantities)
+    if event:
+        event_updated(event)
+
+async def stock_changed(product_ids):
+    if not feed.subscribers:
+        return
+    # Stock after the change, for the products it touched
+    ids = [ObjectId(pid) for pid in product_ids]
+    stock = [
+        {"product_id": str(doc["_id"]), "remaining_quantity": doc.get("remaining_quantity")}
+        async for doc in Product.get_motor_collection().find({"_id": {"$in": ids}}, {"remaining_quantity": 1})
+    ]
+    feed.publish("stock_changed", {"products": stock})
+
+def order_status_changed(order, old_status):
+    feed.publish("order_status", {"order_id": str(order.id), "old_status": old_status, "status": order.status})
+
+def event_created(event):
+    feed.publish("event_created", LiveSellingEventResponse.from_event(event).dict())
+
+def event_updated(event):
+    # Carries the event's new order_count, so clients can rederive each order's ads_fee share
+    feed.publish("event_updated", LiveSellingEventResponse.from_event(event).dict())
@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from auth import create_access_token
+from database import init_db
+from db_stats import QueryStatsListener
+from models.product import Product
+from models.order import Order
+from models.live_event import LiveSellingEvent
+import rollups
+
+# Load benchmark for the API. Seeds a MongoDB database, drives the real FastAPI
+# app through each scenario with concurrent clients and reports p50/p95/p99
+# latency and throughput, as a table and as JSON for CI to compare.
+#
+#   python load_bench.py --mongodb-url mongodb://localhost:27017/product_tracking_bench
+#   python load_bench.py --in-memory            # mongomock-motor stand-in, no mongod needed
+#   python load_bench.py --output results.json --baseline baseline.json --tolerance 0.25
+#
+# Requests go through httpx's ASGI transport, so client and app share one
+# event loop; pass --base-url to drive a running server instead (it must use
+# the same database as --mongodb-url). The seeded database is dropped first,
+# so its name must contain "bench".
+#
+# The in-memory stand-in is for smoke runs only: its timings say nothing about
+# MongoDB, DB command counts read as zero, it ignores partial indexes (they
+# are left out) and it can't run the filtered analytics pipeline ($lookup with
+# let), so analytics_filtered is skipped.
+
+SALES_CHANNELS = ["shopee", "live_selling"]
+SEED_BATCH_SIZE = 1000
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+async def connect(args):
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory needs mongomock-motor: pip install mongomock-motor")
+        Order.Settings.indexes = [i for i in Order.Settings.indexes if "partialFilterExpression" not in i.document]
+        database = AsyncMongoMockClient()["product_tracking_bench"]
+    else:
+        client = AsyncIOMotorClient(args.mongodb_url, event_listeners=[QueryStatsListener()])
+        database = client.get_default_database()
+        if "bench" not in database.name:
+            sys.exit(f"Refusing to drop database {database.name!r}: its name must contain 'bench'")
+        await client.drop_database(database.name)
+    await init_db(database)
+
+async def seed(args, rng):
+    today = date.today()
+    products = [
+        Product(
+            name=f"bench product {i}",
+            name_key=f"bench product {i}",
+            purchase_price=round(rng.uniform(20, 500), 2),
+            shipping_fee=round(rng.uniform(0, 30), 2),
+            purchase_date=today - timedelta(days=rng.randint(0, 365)),
+            registration_date=today - timedelta(days=rng.randint(0, 365)),
+            # Enough stock that no scenario fails on it
+            start_quantity=10 ** 7,
+            remaining_quantity=10 ** 7,
+        )
+        for i in range(args.products)
+    ]
+    for start in range(0, len(products), SEED_BATCH_SIZE):
+        await Product.insert_many(products[start:start + SEED_BATCH_SIZE])
+    products = await Product.find_all().to_list()
+    product_lookup = {str(p.id): p for p in products}
+    product_ids = list(product_lookup)
+
+    events = [
+        LiveSellingEvent(event_date=today - timedelta(days=rng.randint(0, 365)), ads_fee=round(rng.uniform(100, 2000), 2))
+        for _ in range(args.events)
+    ]
+    if events:
+        await LiveSellingEvent.insert_many(events)
+    events = await LiveSellingEvent.find_all().to_list()
+
+    orders = []
+    for _ in range(args.orders):
+        event = rng.choice(events) if events and rng.random() < 0.3 else None
+        orders.append(Order(
+            products=[{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))],
+            sales_channel="live_selling" if event else "shopee",
+            shopee_fee=round(rng.uniform(0, 20), 2),
+            revenue=round(rng.uniform(100, 3000), 2),
+            sold_date=today - timedelta(days=rng.randint(0, 365)),
+            status=rng.choice(["pending", "shipped", "delivered"]),
+            live_selling_event_id=str(event.id) if event else None,
+        ))
+        if event:
+            event.order_count += 1
+    events_by_id = {str(e.id): e for e in events}
+    for order in orders:
+        await order.calculate_profit_and_cost(
+            product_lookup=product_lookup,
+            ads_fee=order.ads_fee_share(events_by_id.get(order.live_selling_event_id)),
+        )
+    for start in range(0, len(orders), SEED_BATCH_SIZE):
+        await Order.insert_many(orders[start:start + SEED_BATCH_SIZE])
+    for event in events:
+        await event.save()
+    await rollups.rebuild()
+    return product_ids
+
+def order_body(rng, product_ids, event_id=None):
+    return {
+        "products": [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))],
+        "sales_channel": "live_selling" if event_id else rng.choice(SALES_CHANNELS),
+        "shopee_fee": round(rng.uniform(0, 20), 2),
+        "revenue": round(rng.uniform(100, 3000), 2),
+        "live_selling_event_id": event_id,
+    }
+
+class PageWalker:
+    # Each request fetches the next page; start over after the last one
+    def __init__(self, path, limit):
+        self.path = path
+        self.limit = limit
+        self.cursor = None
+
+    def request(self):
+        params = {"limit": self.limit}
+        if self.cursor:
+            params["cursor"] = self.cursor
+        return "GET", self.path, {"params": params}
+
+    def update(self, response):
+        self.cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+
+async def run_scenario(client, name, make_request, requests, concurrency, on_response=None):
+    latencies = []
+    db_commands = []
+    errors = {}
+    remaining = [requests]
+
+    async def worker(worker_id):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            method, path, kwargs = make_request(worker_id)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            if "X-DB-Query-Count" in response.headers:
+                db_commands.append(int(response.headers["X-DB-Query-Count"]))
+            if on_response:
+                on_response(worker_id, response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "mean_db_commands": round(sum(db_commands) / len(db_commands), 2) if db_commands else None,
+    }
+    print(
+        f"{name:<20} {result['requests']:>6} req {result['throughput_rps']:>8} req/s  "
+        f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  errors {sum(errors.values())}",
+        file=sys.stderr,
+    )
+    return result
+
+async def run_all(args):
+    rng = random.Random(args.seed)
+    await connect(args)
+    seed_start = time.perf_counter()
+    product_ids = await seed(args, rng)
+    print(f"seeded {args.products} products, {args.orders} orders, {args.events} events in {time.perf_counter() - seed_start:.1f}s", file=sys.stderr)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'FernSudCute'})}"}
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", headers=headers, timeout=60)
+
+    results = {}
+    async with client:
+        async def scenario(name, make_request, on_response=None):
+            if args.scenarios and name not in args.scenarios:
+                return
+            results[name] = await run_scenario(client, name, make_request, args.requests, args.concurrency, on_response)
+
+        await scenario("create_orders", lambda _: ("POST", "/orders/", {"json": order_body(rng, product_ids)}))
+
+        for name, path in (("list_orders", "/orders/"), ("list_products", "/products/")):
+            walkers = [PageWalker(path, args.page_size) for _ in range(args.concurrency)]
+            await scenario(name, lambda i: walkers[i].request(), lambda i, response: walkers[i].update(response))
+
+        await scenario("analytics_summary", lambda _: ("GET", "/analytics/", {}))
+        if args.in_memory:
+            print("analytics_filtered   skipped: the in-memory stand-in can't run $lookup with let", file=sys.stderr)
+        else:
+            month_ago = (date.today() - timedelta(days=30)).isoformat()
+            await scenario("analytics_filtered", lambda _: ("GET", "/analytics/", {"params": {"start_date": month_ago}}))
+
+        if not args.scenarios or "live_event_burst" in args.scenarios:
+            # Many concurrent orders against one new live event, as during a live sale
+            response = await client.post("/live_events/", json={"ads_fee": 1000.0})
+            response.raise_for_status()
+            event_id = response.json()["event_id"]
+            await scenario("live_event_burst", lambda _: ("POST", "/orders/", {"json": order_body(rng, product_ids, event_id)}))
+
+    return {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "in-memory" if args.in_memory else "mongodb",
+            "target": args.base_url or "asgi",
+        },
+        "config": {
+            "products": args.products,
+            "orders": args.orders,
+            "events": args.events,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "page_size": args.page_size,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+def compare(results, baseline, tolerance):
+    # A scenario regresses when p95 latency rises, or throughput drops, by more than tolerance
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if sum(current["errors"].values()) > sum(previous["errors"].values()):
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed MongoDB and load test the API")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017/product_tracking_bench")
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of a mongod")
+    parser.add_argument("--base-url", help="drive a running server instead of the app in-process")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(run_all(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit("Regressions against baseline:\n" + "\n".join(regressions))
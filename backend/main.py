@@ -1,8 +1,10 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Body, Depends, Header, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import List
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from typing import Any, Dict, List, Optional
 import os
-from datetime import timedelta
+import time
+from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (for local development)
@@ -12,9 +14,31 @@ load_dotenv()
 from auth import authenticate_user, create_access_token, verify_token, Token, User, ACCESS_TOKEN_EXPIRE_MINUTES
 from database import init_db
 from models.product import Product
-from models.order import Order
-from models.schemas import ProductCreate, OrderCreate, ProductResponse, OrderUpdate, OrderResponse, LiveSellingEventCreate, LiveSellingEventResponse
+from models.order import Order, OrderStatus
+from models.schemas import ProductCreate, OrderCreate, ProductResponse, OrderUpdate, OrderResponse, LiveSellingEventCreate, LiveSellingEventResponse, ProductPage, OrderPage, BulkItemResult, BulkProductDelete
 from models.live_event import LiveSellingEvent
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pydantic import ValidationError
+import rollups
+import analytics
+import inventory
+import inventory_ledger
+import db_stats
+import live_events
+import pagination
+import exports
+import imports
+import rows
+import change_versions
+import dashboard
+import archive
+import product_search
+from single_flight import reads, make_key
+from product_cache import product_costs
+from metrics import metrics, route_label
+from live_feed import feed
+import live_feed
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -34,11 +58,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats, token = db_stats.begin_request()
+    metrics.in_flight += 1
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        metrics.in_flight -= 1
+        db_stats.end_request(token)
+        metrics.observe_request(
+            request.method, route_label(request), status_code,
+            time.perf_counter() - start, stats.count, stats.duration,
+        )
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    return response
+
 @app.on_event("startup")
 async def app_init():
     await init_db()
+    await product_search.backfill_name_keys()
+    await live_events.backfill_order_counts()
+    await inventory_ledger.ensure_positions()
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -55,6 +102,10 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    return PlainTextResponse(metrics.render() + feed.render_metrics() + reads.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     try:
@@ -64,11 +115,11 @@ async def health_check():
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
-@app.post("/products/", response_model=ProductCreate)
-async def create_product(product: ProductCreate, current_user: User = Depends(get_current_user)):
+def new_product(product: ProductCreate):
     # Set both start and remaining quantity on creation
-    product_doc = Product(
+    return Product(
         name=product.name,
+        name_key=product_search.name_key(product.name),
         purchase_price=product.purchase_price,
         shipping_fee=product.shipping_fee,
         purchase_date=product.purchase_date,
@@ -77,13 +128,107 @@ async def create_product(product: ProductCreate, current_user: User = Depends(ge
         remaining_quantity=product.start_quantity,
         supplier_id=product.supplier_id
     )
+
+@app.get("/cache/stats")
+async def cache_stats(current_user: User = Depends(get_current_user)):
+    return {"product_costs": product_costs.stats()}
+
+@app.post("/products/", response_model=ProductCreate)
+async def create_product(product: ProductCreate, current_user: User = Depends(get_current_user)):
+    product_doc = new_product(product)
     await product_doc.insert()
+    await inventory_ledger.record({str(product_doc.id): product_doc.remaining_quantity}, "initial")
+    await rollups.record_product_created(product_doc)
+    await change_versions.bump(change_versions.PRODUCTS)
     return product_doc
 
-@app.get("/products/", response_model=List[ProductResponse])
-async def read_products(skip: int = 0, limit: int = 100, current_user: User = Depends(get_current_user)):
-    products = await Product.find_all().skip(skip).limit(limit).to_list()
-    return products
+@app.post("/products/bulk", response_model=List[BulkItemResult])
+async def create_products_bulk(items: List[Dict[str, Any]] = Body(...), current_user: User = Depends(get_current_user)):
+    # Invalid items are reported individually; the valid ones go in with one insert_many
+    results = []
+    docs = []
+    for index, item in enumerate(items):
+        try:
+            doc = new_product(ProductCreate(**item))
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=index, error=imports.validation_message(exc)))
+            continue
+        doc.id = PydanticObjectId()
+        docs.append((index, doc))
+        results.append(BulkItemResult(index=index, product_id=str(doc.id)))
+    if docs:
+        await Product.insert_many([doc for _, doc in docs])
+        await inventory_ledger.record({str(doc.id): doc.remaining_quantity for _, doc in docs}, "initial")
+        await rollups.record_products_created([doc for _, doc in docs])
+        await change_versions.bump(change_versions.PRODUCTS)
+    return results
+
+@app.post("/products/bulk_delete", response_model=List[BulkItemResult])
+async def delete_products_bulk(request: BulkProductDelete, current_user: User = Depends(get_current_user)):
+    ids = [ObjectId(pid) for pid in request.product_ids if ObjectId.is_valid(pid)]
+    products = {str(p.id): p for p in await Product.find({"_id": {"$in": ids}}).to_list()}
+    if products:
+        await Product.find({"_id": {"$in": [p.id for p in products.values()]}}).delete()
+        await inventory_ledger.record({pid: p.remaining_quantity for pid, p in products.items()}, "deletion", sign=-1)
+        await rollups.record_products_deleted(list(products.values()))
+        await product_costs.invalidate(list(products))
+        await change_versions.bump(change_versions.PRODUCTS)
+    return [
+        BulkItemResult(index=index, product_id=pid) if pid in products
+        else BulkItemResult(index=index, product_id=pid, error="Product not found")
+        for index, pid in enumerate(request.product_ids)
+    ]
+
+def product_filters(in_stock: Optional[bool] = None):
+    query = {}
+    if in_stock is not None:
+        # The Products page lists in-stock and out-of-stock products separately
+        query["remaining_quantity"] = {"$gt": 0} if in_stock else {"$lte": 0}
+    return query
+
+@app.get("/products/", response_model=ProductPage)
+async def read_products(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=10000),
+    filters: dict = Depends(product_filters),
+    current_user: User = Depends(get_current_user),
+):
+    etag, not_modified = await change_versions.check(request, change_versions.PRODUCTS)
+    if not_modified:
+        return not_modified
+
+    async def page():
+        query = filters
+        if cursor:
+            query = {"$and": [filters, pagination.after_product_cursor(cursor)]}
+        docs = await Product.get_motor_collection().find(query, rows.PRODUCT_PROJECTION).sort(pagination.PRODUCT_SORT).limit(limit + 1).to_list(length=None)
+        next_cursor = pagination.product_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return {"items": [rows.product_row(d) for d in docs[:limit]], "next_cursor": next_cursor}
+
+    etag, payload = await reads.get("products", make_key("products", cursor=cursor, limit=limit, filters=filters), etag, page)
+    return change_versions.tag(ORJSONResponse(payload), etag)
+
+@app.get("/products/search")
+async def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(product_search.DEFAULT_LIMIT, ge=1, le=product_search.MAX_LIMIT),
+    in_stock: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    return ORJSONResponse(await product_search.search(q, limit, in_stock))
+
+@app.get("/products/export")
+async def export_products(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: dict = Depends(product_filters),
+    current_user: User = Depends(get_current_user),
+):
+    return StreamingResponse(
+        exports.stream_products(filters, format),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=products.{format}"},
+    )
 
 @app.delete("/products/{product_id}")
 async def delete_product(product_id: str, current_user: User = Depends(get_current_user)):
@@ -91,68 +236,166 @@ async def delete_product(product_id: str, current_user: User = Depends(get_curre
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     await product.delete()
+    await inventory_ledger.record({product_id: product.remaining_quantity}, "deletion", sign=-1)
+    await rollups.record_product_deleted(product)
+    await product_costs.invalidate([product_id])
+    await change_versions.bump(change_versions.PRODUCTS)
     return {"detail": "Product deleted successfully"}
 
+@app.post("/products/{product_id}/restock", response_model=ProductResponse)
+async def restock_product(product_id: str, quantity: int = Body(..., embed=True, gt=0), current_user: User = Depends(get_current_user)):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    result = await Product.get_motor_collection().update_one({"_id": ObjectId(product_id)}, {"$inc": {"remaining_quantity": quantity}})
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Product not found")
+    await inventory_ledger.record({product_id: quantity}, "restock")
+    await change_versions.bump(change_versions.PRODUCTS)
+    await live_feed.stock_changed([product_id])
+    return ProductResponse.from_product(await Product.get(product_id))
+
+@app.get("/products/{product_id}/stock")
+async def get_product_stock(product_id: str, at: Optional[datetime] = None, current_user: User = Depends(get_current_user)):
+    # Stock on hand at a point in time (now by default), from the inventory ledger
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    stock = await inventory_ledger.stock_at(product_id, at or datetime.utcnow())
+    if stock is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return stock
+
 @app.post("/orders/", response_model=OrderResponse)
 async def create_order(order: OrderCreate, current_user: User = Depends(get_current_user)):
-    # Check and update product stock
-    for item in order.products:
-        product = await Product.get(item.product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
-        if product.remaining_quantity < item.quantity:
-            raise HTTPException(status_code=400, detail=f"Not enough stock for product {product.name}")
-        product.remaining_quantity -= item.quantity
-        await product.save()
     order_doc = Order(**order.dict())
-    # Calculate profit using new logic
-    products = await Product.find_all().to_list()
-    product_lookup = {str(p.id): p for p in products}
-    ads_fee = 0.0
-    if order.live_selling_event_id:
-        from models.live_event import LiveSellingEvent
-        event = await LiveSellingEvent.get(order.live_selling_event_id)
+    order_doc.id = PydanticObjectId()
+    reservation = str(order_doc.id)
+    cancelled = order_doc.status == OrderStatus.CANCELLED.value
+    if cancelled:
+        # Nothing leaves stock unless the order is un-cancelled later
+        reserved = {}
+        needed = inventory.quantities_by_product(order.products)
+    else:
+        # Reserve stock for every line in one bulk write; nothing is decremented if any line fails
+        reserved = await inventory.reserve_stock(order.products, reservation)
+        needed = reserved
+    event = None
+    try:
+        # Calculate profit using new logic
+        product_lookup = await product_costs.get_many(needed)
+        missing = [pid for pid in needed if pid not in product_lookup]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Product {missing[0]} not found")
+        if order.live_selling_event_id:
+            # Counts this order towards the event; the ads_fee share is derived on read
+            event = await live_events.add_order(order.live_selling_event_id)
+        await order_doc.calculate_profit_and_cost(product_lookup=product_lookup, ads_fee=order_doc.ads_fee_share(event))
+        await order_doc.insert()
+    except Exception:
+        await inventory.release_stock(reserved, reservation)
         if event:
-            # Count orders for this event
-            from models.order import Order as OrderModel
-            linked_orders = await OrderModel.find({"live_selling_event_id": order.live_selling_event_id}).to_list()
-            ads_fee = (event.ads_fee or 0) / max(len(linked_orders) + 1, 1)  # +1 for this new order
-    await order_doc.calculate_profit_and_cost(product_lookup=product_lookup, ads_fee=ads_fee)
-    await order_doc.insert()
-
-    # If this order is linked to a live selling event, update profit and total_cost for all linked orders
-    if order.live_selling_event_id and event:
-        # Fetch all orders again (including the new one)
-        from models.order import Order as OrderModel
-        all_linked_orders = await OrderModel.find({"live_selling_event_id": order.live_selling_event_id}).to_list()
-        total_linked = len(all_linked_orders)
-        if total_linked > 0:
-            ads_fee_per_order = (event.ads_fee or 0) / total_linked
-            for o in all_linked_orders:
-                await o.calculate_profit_and_cost(product_lookup=product_lookup, ads_fee=ads_fee_per_order)
-                await o.save()
-
+            await live_events.remove_order(order.live_selling_event_id)
+        raise
+    await inventory.confirm_stock(reserved, reservation)
+    if not cancelled:
+        await inventory_ledger.record_sales([order_doc])
+    await rollups.record_order(order_doc, product_lookup, event)
+    # Stock changed too; an event's order_count changed if the order has one
+    changed = [change_versions.ORDERS, change_versions.PRODUCTS] + ([change_versions.LIVE_EVENTS] if event else [])
+    await change_versions.bump(*changed)
+    await live_feed.order_created(order_doc, reserved, event)
     return OrderResponse.from_order(order_doc)
 
-@app.get("/orders/", response_model=List[OrderResponse])
-async def read_orders(skip: int = 0, limit: int = 100, current_user: User = Depends(get_current_user)):
-    orders = await Order.find_all().skip(skip).limit(limit).to_list()
-    return [OrderResponse.from_order(o) for o in orders]
-
-from beanie import PydanticObjectId
+def order_filters(
+    status: Optional[str] = None,
+    sales_channel: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    live_selling_event_id: Optional[str] = None,
+):
+    query = analytics.build_match(start_date, end_date, sales_channel, live_selling_event_id)
+    if status:
+        query["status"] = status
+    return query
+
+@app.get("/orders/", response_model=OrderPage)
+async def read_orders(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=10000),
+    filters: dict = Depends(order_filters),
+    current_user: User = Depends(get_current_user),
+):
+    # Rows carry each event's current ads_fee share and product names, so events and products count too
+    etag, not_modified = await change_versions.check(request, change_versions.ORDERS, change_versions.LIVE_EVENTS, change_versions.PRODUCTS)
+    if not_modified:
+        return not_modified
+
+    async def page():
+        query = filters
+        if cursor:
+            query = {"$and": [filters, pagination.after_order_cursor(cursor)]}
+        # Raw documents straight to JSON rows; no Beanie or response model per row
+        docs = await Order.get_motor_collection().find(query, rows.ORDER_PROJECTION).sort(pagination.ORDER_SORT).limit(limit + 1).to_list(length=None)
+        next_cursor = pagination.order_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return {"items": await rows.order_rows(docs[:limit]), "next_cursor": next_cursor}
+
+    etag, payload = await reads.get("orders", make_key("orders", cursor=cursor, limit=limit, filters=filters), etag, page)
+    return change_versions.tag(ORJSONResponse(payload), etag)
+
+@app.post("/orders/import")
+async def import_orders(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+):
+    # Body is a CSV (same columns as /orders/export) or NDJSON of OrderCreate rows
+    return await imports.import_orders(request.stream(), format, idempotency_key)
+
+@app.get("/orders/export")
+async def export_orders(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: dict = Depends(order_filters),
+    current_user: User = Depends(get_current_user),
+):
+    return StreamingResponse(
+        exports.stream_orders(filters, format),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=orders.{format}"},
+    )
 
 # --- Live Selling Event Endpoints ---
 
+@app.get("/live_feed")
+async def live_feed_stream(token: str = Query(...)):
+    # Server-Sent Events; EventSource can't set headers, so the JWT comes as ?token=
+    verify_token(token)
+    return StreamingResponse(
+        feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/live_events/", response_model=LiveSellingEventResponse)
 async def create_live_event(event: LiveSellingEventCreate, current_user: User = Depends(get_current_user)):
     obj = LiveSellingEvent(**event.dict())
     await obj.insert()
+    await change_versions.bump(change_versions.LIVE_EVENTS)
+    live_feed.event_created(obj)
     return LiveSellingEventResponse.from_event(obj)
 
 @app.get("/live_events/", response_model=List[LiveSellingEventResponse])
-async def list_live_events(current_user: User = Depends(get_current_user)):
-    events = await LiveSellingEvent.find_all().to_list()
-    return [LiveSellingEventResponse.from_event(e) for e in events]
+async def list_live_events(request: Request, current_user: User = Depends(get_current_user)):
+    etag, not_modified = await change_versions.check(request, change_versions.LIVE_EVENTS)
+    if not_modified:
+        return not_modified
+
+    async def events():
+        docs = await LiveSellingEvent.get_motor_collection().find({}, rows.EVENT_PROJECTION).to_list(length=None)
+        return [rows.event_row(d) for d in docs]
+
+    etag, payload = await reads.get("live_events", make_key("live_events"), etag, events)
+    return change_versions.tag(ORJSONResponse(payload), etag)
 
 @app.get("/live_events/{event_id}", response_model=LiveSellingEventResponse)
 async def get_live_event(event_id: str, current_user: User = Depends(get_current_user)):
@@ -167,71 +410,121 @@ async def delete_live_event(event_id: str, current_user: User = Depends(get_curr
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     await event.delete()
+    await rollups.record_event_deleted(event)
+    await change_versions.bump(change_versions.LIVE_EVENTS)
     return {"detail": "Event deleted successfully"}
 
 @app.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_order(order_id: PydanticObjectId, current_user: User = Depends(get_current_user)):
-    order = await Order.get(order_id)
+    order = await Order.get(order_id) or await archive.find_order(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
+    await live_events.with_current_ads_fees([order])
     return OrderResponse.from_order(order)
 
 @app.patch("/orders/{order_id}", response_model=OrderResponse)
 async def update_order_status(order_id: PydanticObjectId, update: OrderUpdate, current_user: User = Depends(get_current_user)):
     order = await Order.get(order_id)
     if not order:
+        if await archive.find_order(order_id):
+            raise HTTPException(status_code=409, detail="Archived orders can't be changed")
         raise HTTPException(status_code=404, detail="Order not found")
+    old_status = order.status
+    if update.status == old_status:
+        await live_events.with_current_ads_fees([order])
+        return OrderResponse.from_order(order)
+    # Claim the transition before touching stock, so of two concurrent
+    # requests from the same status only one returns or takes the units
+    orders = Order.get_motor_collection()
+    claimed = await orders.find_one_and_update({"_id": order.id, "status": old_status}, {"$set": {"status": update.status}})
+    if claimed is None:
+        if await archive.find_order(order_id):
+            raise HTTPException(status_code=409, detail="Archived orders can't be changed")
+        raise HTTPException(status_code=409, detail="Order status changed meanwhile, please retry")
+    cancelled = OrderStatus.CANCELLED.value
+    quantities = inventory.quantities_by_product(order.products)
+    restocked = False
+    if update.status == cancelled:
+        # A cancelled order's units go back on the shelf
+        await inventory.return_stock(quantities)
+        await inventory_ledger.record(quantities, "cancellation", str(order.id))
+        restocked = True
+    elif old_status == cancelled:
+        reservation = str(order.id)
+        try:
+            await inventory.reserve_stock(order.products, reservation)
+        except HTTPException:
+            await orders.update_one({"_id": order.id, "status": update.status}, {"$set": {"status": old_status}})
+            raise
+        await inventory.confirm_stock(quantities, reservation)
+        await inventory_ledger.record_sales([order])
+        restocked = True
     order.status = update.status
-    await order.save()
+    await rollups.record_status_change(order, old_status, order.status)
+    await change_versions.bump(*([change_versions.ORDERS] + ([change_versions.PRODUCTS] if restocked else [])))
+    live_feed.order_status_changed(order, old_status)
+    if restocked:
+        await live_feed.stock_changed(quantities)
+    await live_events.with_current_ads_fees([order])
     return OrderResponse.from_order(order)
 
-from datetime import datetime
+@app.get("/dashboard")
+async def get_dashboard(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated sections: " + ", ".join(dashboard.SECTIONS)),
+    current_user: User = Depends(get_current_user),
+):
+    names = dashboard.parse_fields(fields)
+    etag, not_modified = await change_versions.check(request, *change_versions.ANALYTICS, extra=date.today().isoformat())
+    if not_modified:
+        return not_modified
+    etag, payload = await reads.get("dashboard", make_key("dashboard", fields=names), etag, lambda: dashboard.summary(names))
+    return change_versions.tag(ORJSONResponse(payload), etag)
+
+@app.get("/analytics/breakdown")
+async def get_analytics_breakdown(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sales_channel: Optional[str] = None,
+    live_selling_event_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    # Per-day, per-channel and top-product series for the analytics charts, archive included
+    etag, not_modified = await change_versions.check(request, *change_versions.ANALYTICS)
+    if not_modified:
+        return not_modified
+    match = analytics.build_match(start_date, end_date, sales_channel, live_selling_event_id)
+
+    async def series():
+        if match:
+            return await analytics.filtered_breakdown(match)
+        return await rollups.read_breakdown(analytics.TOP_PRODUCTS)
+
+    etag, payload = await reads.get("analytics_breakdown", make_key("analytics_breakdown", match=match), etag, series)
+    return change_versions.tag(ORJSONResponse(payload), etag)
 
 @app.get("/analytics/")
-async def get_analytics(current_user: User = Depends(get_current_user)):
-    orders = await Order.find_all().to_list()
-    products = await Product.find_all().to_list()
-    product_lookup = {str(p.id): p for p in products}
-
-    # Fetch all live-selling events and build lookup
-    from models.live_event import LiveSellingEvent
-    events = await LiveSellingEvent.find_all().to_list()
-    event_lookup = {str(e.id): e for e in events}
-    # Map event_id to list of orders
-    event_orders = {}
-    for order in orders:
-        if order.live_selling_event_id:
-            event_orders.setdefault(order.live_selling_event_id, []).append(order)
-
-    total_revenue = 0.0
-    total_profit = 0.0
-    for order in orders:
-        # Allocate ads_fee if order is linked to event
-        ads_fee = 0.0
-        if order.live_selling_event_id and order.live_selling_event_id in event_lookup:
-            event = event_lookup[order.live_selling_event_id]
-            linked_orders = event_orders[order.live_selling_event_id]
-            ads_fee = (event.ads_fee or 0) / max(len(linked_orders), 1)
-        order_total_cost = (
-            (order.shopee_fee or 0)
-            + ads_fee
-            + (order.shipping_fee or 0)
-            + sum((product_lookup.get(item.product_id).purchase_price or 0) * item.quantity for item in order.products if product_lookup.get(item.product_id))
-            - (order.seller_coupon or 0)
-        )
-        total_revenue += order.revenue
-        total_profit += order.revenue - order_total_cost
-
-    today = datetime.now().date()
-    days_in_inventory = [
-        (today - (p.registration_date or today)).days
-        for p in products if p.registration_date
-    ]
-    average_days_in_inventory = sum(days_in_inventory) / len(days_in_inventory) if days_in_inventory else 0
-
-    return {
-        "total_revenue": total_revenue,
-        "total_profit": total_profit,
-        "average_days_in_inventory": average_days_in_inventory
-    }
-
+async def get_analytics(
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    sales_channel: Optional[str] = None,
+    live_selling_event_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    # average_days_in_inventory moves with the date, so today is part of the tag
+    etag, not_modified = await change_versions.check(request, *change_versions.ANALYTICS, extra=date.today().isoformat())
+    if not_modified:
+        return not_modified
+    match = analytics.build_match(start_date, end_date, sales_channel, live_selling_event_id)
+
+    async def summary():
+        if match:
+            return await analytics.filtered_summary(match)
+        # Served from the pre-aggregated rollups; see rollups.py (rebuild with `python rollups.py rebuild`)
+        return await rollups.read_summary()
+
+    # Dashboards opening together share one computation
+    etag, payload = await reads.get("analytics", make_key("analytics", match=match), etag, summary)
+    return change_versions.tag(ORJSONResponse(payload), etag)
@@ -0,0 +1,92 @@
+from bisect import bisect_left
+
+# In-process request metrics served at /metrics in the Prometheus text format.
+# Everything is recorded from the request middleware on the event loop, so
+# plain counters are enough; each worker reports its own numbers.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_COMMAND_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+class Metrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.request_seconds = {}
+        self.db_commands = {}
+        self.db_seconds = {}
+        self.errors = {}
+
+    def _histogram(self, family, labels, buckets):
+        histogram = family.get(labels)
+        if histogram is None:
+            histogram = family[labels] = Histogram(buckets)
+        return histogram
+
+    def observe_request(self, method, route, status_code, seconds, db_commands, db_seconds):
+        labels = (method, route)
+        self._histogram(self.request_seconds, labels, LATENCY_BUCKETS).observe(seconds)
+        self._histogram(self.db_commands, labels, DB_COMMAND_BUCKETS).observe(db_commands)
+        self._histogram(self.db_seconds, labels, LATENCY_BUCKETS).observe(db_seconds)
+        if status_code >= 400:
+            key = (method, route, str(status_code))
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def render(self):
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        lines += _render_histogram("http_request_duration_seconds", "Request latency by route.", self.request_seconds)
+        lines += _render_histogram("http_request_db_commands", "MongoDB commands issued per request.", self.db_commands)
+        lines += _render_histogram("http_request_db_duration_seconds", "Time spent in MongoDB commands per request.", self.db_seconds)
+        lines += [
+            "# HELP http_request_errors_total Responses with a 4xx or 5xx status.",
+            "# TYPE http_request_errors_total counter",
+        ]
+        for (method, route, status_code), count in sorted(self.errors.items()):
+            lines.append(f'http_request_errors_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+def _render_histogram(name, help_text, family):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(family.items()):
+        labels = f'method="{method}",route="{route}"'
+        for bound, total in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+_route_paths = {}
+
+def route_label(request):
+    # Label by route template (/orders/{order_id}), never the raw path, to keep label cardinality bounded
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    if endpoint not in _route_paths:
+        for route in request.app.routes:
+            if getattr(route, "endpoint", None) is not None:
+                _route_paths[route.endpoint] = route.path
+    return _route_paths.get(endpoint, UNMATCHED_ROUTE)
+
+metrics = Metrics()
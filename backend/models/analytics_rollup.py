@@ -0,0 +1,28 @@
+from beanie import Document
+from pymongo import IndexModel
+from pydantic import Field
+from typing import Optional, Dict
+
+class AnalyticsRollup(Document):
+    # One pre-aggregated bucket, e.g. key="total", "day:2024-05-01",
+    # "channel:shopee", "event:<event_id>" or "inventory"
+    key: str
+    kind: str
+    order_count: int = 0
+    revenue: float = 0.0
+    base_cost: float = 0.0  # Sum of the orders' cost at sale (Order.cost_at_sale)
+    ads_fee: float = 0.0
+    product_units: Dict[str, int] = Field(default_factory=dict)
+    status_counts: Dict[str, int] = Field(default_factory=dict)
+    # Inventory bucket only
+    product_count: int = 0
+    registration_ordinal_sum: int = 0
+    # Units in stock and their summed received date ordinals, from the ledger's
+    # FIFO positions; absent until inventory_ledger.build_positions has run
+    stock_units: Optional[int] = None
+    stock_ordinal_sum: Optional[int] = None
+    live_selling_event_id: Optional[str] = None
+
+    class Settings:
+        name = "analytics_rollups"
+        indexes = [IndexModel([("key", 1)], unique=True)]
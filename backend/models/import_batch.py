@@ -0,0 +1,16 @@
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+class ImportBatch(Document):
+    # One bulk order upload, keyed by the client's Idempotency-Key
+    key: str
+    status: str = "running"  # running | failed | completed
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "import_batches"
+        indexes = [IndexModel([("key", 1)], unique=True)]
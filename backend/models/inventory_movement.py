@@ -0,0 +1,21 @@
+from beanie import Document
+from pymongo import IndexModel, ASCENDING
+from pydantic import Field
+from typing import Optional
+from datetime import datetime
+
+class InventoryMovement(Document):
+    # One change to a product's stock; the ledger is append-only
+    product_id: str
+    delta: int  # units in (+) or out (-)
+    reason: str  # initial | sale | restock | cancellation | deletion
+    order_id: Optional[str] = None
+    at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "inventory_movements"
+        indexes = [
+            IndexModel([("product_id", ASCENDING), ("at", ASCENDING)]),
+            # Everything since the last snapshot run
+            IndexModel([("at", ASCENDING)]),
+        ]
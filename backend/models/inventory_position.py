@@ -0,0 +1,18 @@
+from beanie import Document
+from pymongo import IndexModel, ASCENDING
+from pydantic import Field
+from typing import List, Dict, Any
+
+class InventoryPosition(Document):
+    # A product's current stock as FIFO layers of {"received": datetime,
+    # "units": int}, oldest first, updated with every ledger movement.
+    # version guards concurrent updates.
+    product_id: str
+    quantity: int = 0
+    layers: List[Dict[str, Any]] = Field(default_factory=list)
+    received_ordinal_sum: int = 0  # sum of units * received date ordinal
+    version: int = 0
+
+    class Settings:
+        name = "inventory_positions"
+        indexes = [IndexModel([("product_id", ASCENDING)], unique=True)]
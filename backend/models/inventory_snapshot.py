@@ -0,0 +1,19 @@
+from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pydantic import Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+class InventorySnapshot(Document):
+    # A product's stock at a point in time, as FIFO layers of
+    # {"received": datetime, "units": int}, oldest first. The document with
+    # product_id None holds the totals of one snapshot run across all products.
+    product_id: Optional[str] = None
+    at: datetime
+    quantity: int = 0
+    layers: List[Dict[str, Any]] = Field(default_factory=list)
+    received_ordinal_sum: int = 0  # sum of units * received date ordinal
+
+    class Settings:
+        name = "inventory_snapshots"
+        indexes = [IndexModel([("product_id", ASCENDING), ("at", DESCENDING)])]
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field
 from typing import Optional, List
 from datetime import date
@@ -7,9 +8,15 @@ class LiveSellingEvent(Document):
     event_date: date = Field(default_factory=date.today)
     ads_fee: float
     notes: Optional[str] = None
+    # Number of orders linked to this event; each gets ads_fee / order_count
+    order_count: int = 0
 
     class Settings:
         name = "live_selling_events"
+        indexes = [
+            # Upcoming events on /dashboard
+            IndexModel([("event_date", ASCENDING), ("_id", ASCENDING)]),
+        ]
 
     @property
     def event_id(self):
@@ -1,5 +1,6 @@
 from enum import Enum as PyEnum
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from typing import Optional
 from datetime import date
 from pydantic import Field
@@ -25,35 +26,75 @@ class Order(Document):
     shipping_fee: Optional[float] = 0.0
     seller_coupon: Optional[float] = 0.0
     revenue: float
+    # base_cost is the authoritative stored figure. total_cost and profit add
+    # the event's ads_fee share as it was when saved; reads re-derive them
+    # with the current share (see live_events.with_current_ads_fees, rows.order_row)
     total_cost: Optional[float] = 0.0
     profit: Optional[float] = 0.0
+    base_cost: Optional[float] = None  # total_cost without the live event ads_fee share
+    # Set on orders created by POST /orders/import with an Idempotency-Key
+    import_key: Optional[str] = None
+    import_row: Optional[int] = None
     sold_date: Optional[date] = Field(default_factory=date.today)
     status: str = Field(default=OrderStatus.PENDING.value)
     live_selling_event_id: Optional[str] = None  # Reference to LiveSellingEvent
 
     class Settings:
         name = "orders"
+        indexes = [
+            # Keyset pagination for /orders/ (see pagination.py)
+            IndexModel([("sold_date", DESCENDING), ("_id", DESCENDING)]),
+            # Filtered pages walk their filter's slice of the page order; the
+            # prefixes also serve the plain equality lookups
+            IndexModel([("status", ASCENDING), ("sold_date", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("sales_channel", ASCENDING), ("sold_date", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("live_selling_event_id", ASCENDING), ("sold_date", DESCENDING), ("_id", DESCENDING)]),
+            IndexModel([("products.product_id", ASCENDING)]),
+            IndexModel(
+                [("import_key", ASCENDING), ("import_row", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"import_key": {"$type": "string"}},
+            ),
+        ]
 
-    async def calculate_profit_and_cost(self, product_lookup=None, ads_fee=0.0):
-        # Calculate product cost using new formula
-        product_cost = 0.0
-        if product_lookup:
-            for item in self.products:
-                prod = product_lookup.get(item.product_id)
-                if prod:
-                    # (product price * quantity + product.shipping_fee / quantity)
-                    shipping_fee_per_unit = (prod.shipping_fee or 0) / item.quantity if item.quantity else 0
-                    product_cost += (prod.purchase_price or 0) * item.quantity + shipping_fee_per_unit * item.quantity
-        total_cost = (
-            product_cost
-            + (self.shopee_fee or 0)
-            + (self.shipping_fee or 0)
-            + (self.seller_coupon or 0)
-            + (ads_fee if self.live_selling_event_id else 0)
+    # The one cost formula: each product line costs its purchase price per unit
+    # plus the product's shipping_fee, and the order adds its shopee and
+    # shipping fees and the seller coupon
+    def product_cost(self, product_lookup=None):
+        return sum(
+            (product_lookup[item.product_id].purchase_price or 0) * item.quantity
+            + (product_lookup[item.product_id].shipping_fee or 0)
+            for item in self.products if product_lookup and item.product_id in product_lookup
         )
-        self.total_cost = total_cost
-        self.profit = self.revenue - total_cost
+
+    def order_fees(self):
+        return (self.shopee_fee or 0) + (self.shipping_fee or 0) + (self.seller_coupon or 0)
+
+    def cost_at_sale(self, product_lookup=None):
+        # The rollups and /analytics/ add up the stored base_cost, so deleting
+        # or repricing a product later doesn't change past profit; orders
+        # stored before base_cost existed fall back to the current products
+        if self.base_cost is not None:
+            return self.base_cost
+        return self.product_cost(product_lookup) + self.order_fees()
+
+    async def calculate_profit_and_cost(self, product_lookup=None, ads_fee=0.0):
+        self.base_cost = self.product_cost(product_lookup) + self.order_fees()
+        self.apply_ads_fee(ads_fee)
         return self.profit
+
+    def apply_ads_fee(self, ads_fee=0.0):
+        # Orders stored before base_cost existed keep their saved figures
+        if self.base_cost is None:
+            return
+        self.total_cost = self.base_cost + (ads_fee if self.live_selling_event_id else 0)
+        self.profit = self.revenue - self.total_cost
+
+    def ads_fee_share(self, event):
+        # The event's ads_fee is split evenly over all of its orders, as in /analytics/
+        if not event or not self.live_selling_event_id:
+            return 0.0
+        return (event.ads_fee or 0) / max(event.order_count or 0, 1)
     
     @property
     def order_id(self):
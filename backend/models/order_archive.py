@@ -0,0 +1,20 @@
+from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pydantic import Field
+from typing import List, Dict, Any
+from datetime import datetime
+
+class OrderArchive(Document):
+    # Closed orders from one calendar month, moved out of "orders" by archive.py.
+    # Each entry is the raw order document; a month spans as many buckets as it needs.
+    month: datetime  # first day of the month
+    order_count: int = 0
+    orders: List[Dict[str, Any]] = Field(default_factory=list)
+
+    class Settings:
+        name = "order_archive"
+        indexes = [
+            IndexModel([("month", DESCENDING), ("order_count", ASCENDING)]),
+            # get_order fallback
+            IndexModel([("orders._id", ASCENDING)]),
+        ]
@@ -1,7 +1,8 @@
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from bson import ObjectId
 from pydantic import Field
-from typing import Optional
+from typing import Optional, List
 from datetime import date
 from enum import Enum as PyEnum
 
@@ -18,9 +19,21 @@ class Product(Document):
     start_quantity: int
     remaining_quantity: int
     supplier_id: Optional[int] = None
+    # Lowercased name for prefix search (see product_search.py)
+    name_key: Optional[str] = None
+    # Order ids holding an in-flight stock reservation (see inventory.py)
+    pending_reservations: List[str] = Field(default_factory=list)
 
     class Settings:
         name = "products"
+        indexes = [
+            IndexModel([("name", ASCENDING)]),
+            # GET /products/search; remaining_quantity lets in_stock filter inside the index
+            IndexModel([("name_key", ASCENDING), ("remaining_quantity", ASCENDING)]),
+            IndexModel([("registration_date", ASCENDING)]),
+            # Low-stock list on /dashboard
+            IndexModel([("remaining_quantity", ASCENDING), ("_id", ASCENDING)]),
+        ]
 
     @property
     def product_id(self):
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Any
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date
 
 class LiveSellingEventCreate(BaseModel):
@@ -13,6 +13,7 @@ class LiveSellingEventResponse(BaseModel):
     event_date: date
     ads_fee: float
     notes: Optional[str] = None
+    order_count: int = 0
 
     @classmethod
     def from_event(cls, event: Any):
@@ -21,6 +22,7 @@ class LiveSellingEventResponse(BaseModel):
             event_date=event.event_date,
             ads_fee=event.ads_fee,
             notes=event.notes,
+            order_count=event.order_count,
         )
 
 class ProductCreate(BaseModel):
@@ -32,6 +34,14 @@ class ProductCreate(BaseModel):
     start_quantity: int
     supplier_id: Optional[int] = None
 
+class BulkProductDelete(BaseModel):
+    product_ids: List[str]
+
+class BulkItemResult(BaseModel):
+    index: int
+    product_id: Optional[str] = None
+    error: Optional[str] = None
+
 class ProductResponse(BaseModel):
     product_id: str
     name: str
@@ -49,6 +59,7 @@ class ProductResponse(BaseModel):
             product_id=str(product.id),
             name=product.name,
             purchase_price=product.purchase_price,
+            shipping_fee=product.shipping_fee,
             purchase_date=product.purchase_date,
             registration_date=product.registration_date,
             start_quantity=product.start_quantity,
@@ -92,6 +103,18 @@ class OrderResponse(BaseModel):
             live_selling_event_id=getattr(order, 'live_selling_event_id', None)
         )
 
+class ProductPage(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+class OrderRow(OrderResponse):
+    # product_id -> name, None for products that were deleted
+    product_names: Dict[str, Optional[str]] = {}
+
+class OrderPage(BaseModel):
+    items: List[OrderRow]
+    next_cursor: Optional[str] = None
+
 class OrderUpdate(BaseModel):
     status: str
 
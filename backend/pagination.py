@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import date, datetime, time
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+# Opaque keyset cursors: the sort key of the last row on a page, base64 encoded.
+# Following a cursor is an index range scan, so deep pages cost the same as the first.
+
+def encode_cursor(**key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        key["id"] = ObjectId(key["id"])
+        if key.get("d") is not None:
+            key["d"] = date.fromisoformat(key["d"])
+        return key
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _as_datetime(value: date):
+    return datetime.combine(value, time.min)
+
+def order_cursor(doc):
+    # doc is a raw orders document; sold_date comes back from BSON as a datetime
+    sold_date = doc.get("sold_date")
+    return encode_cursor(d=sold_date.date().isoformat() if sold_date else None, id=str(doc["_id"]))
+
+def after_order_cursor(cursor: str):
+    # Orders are sorted by (sold_date, _id) descending; null sold_dates sort last
+    key = decode_cursor(cursor)
+    last_id = key["id"]
+    if key.get("d") is None:
+        return {"sold_date": None, "_id": {"$lt": last_id}}
+    sold_date = _as_datetime(key["d"])
+    return {"$or": [
+        {"sold_date": {"$lt": sold_date}},
+        {"sold_date": sold_date, "_id": {"$lt": last_id}},
+        {"sold_date": None},
+    ]}
+
+ORDER_SORT = [("sold_date", -1), ("_id", -1)]
+
+def product_cursor(doc):
+    return encode_cursor(id=str(doc["_id"]))
+
+def after_product_cursor(cursor: str):
+    # Products are sorted by _id ascending
+    return {"_id": {"$gt": decode_cursor(cursor)["id"]}}
+
+PRODUCT_SORT = [("_id", 1)]
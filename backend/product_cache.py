@@ -0,0 +1,108 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+from models.product import Product
+
+# Bounded LRU cache of the per-product data order costing needs. Writes in this
+# process invalidate entries directly; other workers notice through a version
+# counter document in MongoDB, checked at most once every version_ttl seconds.
+
+class ProductCost(BaseModel):
+    name: str
+    purchase_price: float
+    shipping_fee: Optional[float] = 0.0
+
+class ProductCostCache:
+    def __init__(self, maxsize: int = 10000, version_ttl: float = 1.0):
+        self.maxsize = maxsize
+        self.version_ttl = version_ttl
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _versions(self):
+        return Product.get_motor_collection().database["cache_versions"]
+
+    async def _sync_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.version_ttl:
+            return
+        self._checked_at = now
+        doc = await self._versions().find_one({"_id": "product_costs"})
+        version = doc["version"] if doc else 0
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _put(self, product_id, cost):
+        self._entries[product_id] = cost
+        self._entries.move_to_end(product_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, product_ids):
+        await self._sync_version()
+        found = {}
+        missing = []
+        for pid in set(product_ids):
+            cost = self._entries.get(pid)
+            if cost is None:
+                missing.append(pid)
+            else:
+                self._entries.move_to_end(pid)
+                found[pid] = cost
+        self.hits += len(found)
+        self.misses += len(missing)
+        ids = [ObjectId(pid) for pid in missing if ObjectId.is_valid(pid)]
+        if ids:
+            projection = {"name": 1, "purchase_price": 1, "shipping_fee": 1}
+            async for doc in Product.get_motor_collection().find({"_id": {"$in": ids}}, projection):
+                pid = str(doc["_id"])
+                cost = ProductCost(name=doc["name"], purchase_price=doc["purchase_price"], shipping_fee=doc.get("shipping_fee"))
+                found[pid] = cost
+                self._put(pid, cost)
+        return found
+
+    async def invalidate(self, product_ids):
+        # Call after a write that changes or deletes an existing product. New
+        # products need none: only found products are cached, so an id that
+        # didn't exist yet was never cached.
+        for pid in product_ids:
+            self._entries.pop(pid, None)
+        doc = await self._versions().find_one_and_update(
+            {"_id": "product_costs"},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if self._version is not None and doc["version"] == self._version + 1:
+            # Only our own bump happened; nothing else to flush
+            self._version = doc["version"]
+        else:
+            self._checked_at = 0.0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "version": self._version,
+        }
+
+product_costs = ProductCostCache(
+    maxsize=int(os.getenv("PRODUCT_CACHE_SIZE", "10000")),
+    version_ttl=float(os.getenv("PRODUCT_CACHE_VERSION_TTL", "1.0")),
+)
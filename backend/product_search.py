@@ -0,0 +1,36 @@
+import re
+from pymongo import UpdateOne
+
+from models.product import Product
+import rows
+
+# Prefix search over product names for the order entry form. Names are
+# matched on Product.name_key, a lowercased copy of the name, so an anchored
+# regex becomes a tight range scan on the (name_key, remaining_quantity) index.
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+def name_key(name: str):
+    return " ".join(name.split()).lower()
+
+async def backfill_name_keys(batch_size: int = 1000):
+    # Products created before name_key existed; cheap once they're all set
+    collection = Product.get_motor_collection()
+    while True:
+        docs = await collection.find({"name_key": None}, {"name": 1}).limit(batch_size).to_list(length=None)
+        if not docs:
+            return
+        await collection.bulk_write(
+            [UpdateOne({"_id": d["_id"]}, {"$set": {"name_key": name_key(d.get("name") or "")}}) for d in docs],
+            ordered=False,
+        )
+
+async def search(q: str, limit: int = DEFAULT_LIMIT, in_stock: bool = False):
+    prefix = name_key(q) + (" " if q[-1:].isspace() else "")
+    query = {"name_key": {"$regex": "^" + re.escape(prefix)}}
+    if in_stock:
+        query["remaining_quantity"] = {"$gt": 0}
+    # Sorting on the index's leading key alone avoids an in-memory sort of every match
+    docs = await Product.get_motor_collection().find(query, rows.SEARCH_PROJECTION).sort("name_key", 1).limit(limit).to_list(length=None)
+    return [rows.search_row(d) for d in docs]
@@ -0,0 +1,123 @@
+import json
+import sys
+from datetime import date, datetime, time, timedelta
+
+from models.product import Product
+from models.order import Order
+from models.live_event import LiveSellingEvent
+from models.order_archive import OrderArchive
+from models.inventory_movement import InventoryMovement
+from models.inventory_snapshot import InventorySnapshot
+from models.inventory_position import InventoryPosition
+from bson import ObjectId
+import analytics
+import archive
+import dashboard
+import pagination
+import product_search
+
+# Prints the winning explain() plan for the app's main queries so a missing
+# index shows up as a COLLSCAN: python query_plans.py [--verbose]
+
+SAMPLE_ID = "000000000000000000000000"
+
+def _orders():
+    return Order.get_motor_collection()
+
+def _archive():
+    return OrderArchive.get_motor_collection()
+
+def _products():
+    return Product.get_motor_collection()
+
+def main_queries():
+    month_ago = date.today() - timedelta(days=30)
+    return [
+        ("orders by live event", lambda: _orders().find({"live_selling_event_id": SAMPLE_ID}).explain()),
+        ("orders page", lambda: _orders().find({}).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders page after cursor", lambda: _orders().find(
+            pagination.after_order_cursor(pagination.encode_cursor(d=date.today().isoformat(), id=SAMPLE_ID))
+        ).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders by status", lambda: _orders().find({"status": "pending"}).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders by sales channel", lambda: _orders().find({"sales_channel": "shopee"}).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders by live event page", lambda: _orders().find({"live_selling_event_id": SAMPLE_ID}).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders by status after cursor", lambda: _orders().find({"$and": [
+            {"status": "pending"},
+            pagination.after_order_cursor(pagination.encode_cursor(d=date.today().isoformat(), id=SAMPLE_ID)),
+        ]}).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("orders in date range", lambda: _orders().find(analytics.build_match(start_date=month_ago)).sort(pagination.ORDER_SORT).limit(101).explain()),
+        ("archived order by id", lambda: _archive().find({"orders._id": ObjectId(SAMPLE_ID)}).explain()),
+        ("archive buckets by month", lambda: _archive().find({"month": {"$gte": datetime(2024, 1, 1)}}).sort("month", -1).explain()),
+        ("orders to archive", lambda: _orders().find(
+            {"status": {"$in": archive.CLOSED_STATUSES}, "sold_date": {"$lt": datetime.combine(month_ago, time.min)}}
+        ).sort([("sold_date", 1), ("_id", 1)]).limit(archive.BATCH_SIZE).explain()),
+        ("orders containing product", lambda: _orders().find({"products.product_id": SAMPLE_ID}).explain()),
+        ("products page", lambda: _products().find({}).sort(pagination.PRODUCT_SORT).limit(101).explain()),
+        ("in-stock products page", lambda: _products().find({"remaining_quantity": {"$gt": 0}}).sort(pagination.PRODUCT_SORT).limit(101).explain()),
+        ("out-of-stock products page", lambda: _products().find({"remaining_quantity": {"$lte": 0}}).sort(pagination.PRODUCT_SORT).limit(101).explain()),
+        ("products by name", lambda: _products().find({"name": "sample"}).explain()),
+        ("product name prefix search", lambda: _products().find(
+            {"name_key": {"$regex": "^samp"}, "remaining_quantity": {"$gt": 0}}
+        ).sort("name_key", 1).limit(product_search.DEFAULT_LIMIT).explain()),
+        ("low stock products", lambda: _products().find({"remaining_quantity": {"$lte": dashboard.LOW_STOCK_THRESHOLD}}).sort([("remaining_quantity", 1), ("_id", 1)]).limit(dashboard.LOW_STOCK_LIMIT).explain()),
+        ("upcoming live events", lambda: LiveSellingEvent.get_motor_collection().find(
+            {"event_date": {"$gte": datetime.combine(date.today(), time.min)}}
+        ).sort([("event_date", 1), ("_id", 1)]).limit(dashboard.UPCOMING_EVENTS_LIMIT).explain()),
+        ("latest inventory snapshot run", lambda: InventorySnapshot.get_motor_collection().find({"product_id": None}).sort("at", -1).limit(1).explain()),
+        ("product snapshot before date", lambda: InventorySnapshot.get_motor_collection().find(
+            {"product_id": SAMPLE_ID, "at": {"$lte": datetime.combine(month_ago, time.min)}}
+        ).sort("at", -1).limit(1).explain()),
+        ("inventory movements since snapshot", lambda: InventoryMovement.get_motor_collection().find(
+            {"at": {"$gt": datetime.combine(month_ago, time.min), "$lte": datetime.utcnow()}}
+        ).sort([("at", 1), ("_id", 1)]).explain()),
+        ("inventory positions of moved products", lambda: InventoryPosition.get_motor_collection().find({"product_id": {"$in": [SAMPLE_ID]}}).explain()),
+        ("product movements in range", lambda: InventoryMovement.get_motor_collection().find(
+            {"product_id": {"$in": [SAMPLE_ID]}, "at": {"$gt": datetime.combine(month_ago, time.min), "$lte": datetime.utcnow()}}
+        ).sort([("at", 1), ("_id", 1)]).explain()),
+        ("filtered analytics", lambda: _orders().database.command(
+            "explain",
+            {"aggregate": Order.get_motor_collection().name, "pipeline": analytics.build_pipeline(analytics.build_match(start_date=month_ago)), "cursor": {}},
+            verbosity="queryPlanner",
+        )),
+    ]
+
+def plan_stages(explain_output):
+    # Collect stage names from every winningPlan in the output (find and aggregate shapes differ)
+    stages = []
+
+    def walk(node, in_plan=False):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, in_plan)
+
+    walk(explain_output)
+    return stages
+
+async def explain_all(verbose=False):
+    collection_scans = []
+    for name, run in main_queries():
+        output = await run()
+        stages = plan_stages(output)
+        print(f"{name}: {' <- '.join(stages) or 'no plan'}")
+        if verbose:
+            print(json.dumps(output, indent=2, default=str))
+        if "COLLSCAN" in stages:
+            collection_scans.append(name)
+    return collection_scans
+
+if __name__ == "__main__":
+    import asyncio
+    from database import init_db
+
+    async def _main():
+        await init_db()
+        collection_scans = await explain_all(verbose="--verbose" in sys.argv[1:])
+        if collection_scans:
+            sys.exit(f"Collection scans in: {', '.join(collection_scans)}")
+
+    asyncio.run(_main())
@@ -0,0 +1,297 @@
+from datetime import date, datetime
+from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+
+from models.analytics_rollup import AnalyticsRollup
+import change_versions
+
+# Pre-aggregated analytics buckets, kept up to date by the write endpoints so
+# that /analytics/ reads a couple of documents instead of every order.
+TOTAL_KEY = "total"
+INVENTORY_KEY = "inventory"
+
+def _collection():
+    return AnalyticsRollup.get_motor_collection()
+
+def _iso(value):
+    return value.date().isoformat() if isinstance(value, datetime) else value
+
+def _day_key(order):
+    return f"day:{order.sold_date.isoformat() if order.sold_date else 'none'}"
+
+def _order_buckets(order, with_event=True):
+    buckets = [
+        ("total", TOTAL_KEY),
+        ("day", _day_key(order)),
+        ("channel", f"channel:{order.sales_channel}"),
+    ]
+    if with_event and order.live_selling_event_id:
+        buckets.append(("event", f"event:{order.live_selling_event_id}"))
+    return buckets
+
+def order_increments(order, product_lookup, sign=1):
+    inc = {
+        "order_count": sign,
+        "revenue": sign * order.revenue,
+        "base_cost": sign * order.cost_at_sale(product_lookup),
+        f"status_counts.{order.status}": sign,
+    }
+    for item in order.products:
+        if item.product_id in product_lookup:
+            units_key = f"product_units.{item.product_id}"
+            inc[units_key] = inc.get(units_key, 0) + sign * item.quantity
+    return inc
+
+async def record_order(order, product_lookup, event=None):
+    events = {order.live_selling_event_id: event} if event else {}
+    await record_orders([order], product_lookup, events)
+
+def _merge(buckets, kind, key, inc):
+    merged = buckets.setdefault(key, (kind, {}))[1]
+    for field, value in inc.items():
+        merged[field] = merged.get(field, 0) + value
+
+async def record_orders(orders, product_lookup, events):
+    # events maps live_selling_event_id -> LiveSellingEvent for the events that exist
+    collection = _collection()
+    buckets = {}
+    event_buckets = {}
+    for order in orders:
+        inc = order_increments(order, product_lookup)
+        for kind, key in _order_buckets(order, with_event=False):
+            _merge(buckets, kind, key, inc)
+        if order.live_selling_event_id in events:
+            _merge(event_buckets, order.live_selling_event_id, f"event:{order.live_selling_event_id}", inc)
+    ads_fee = 0.0
+    for key, (event_id, inc) in event_buckets.items():
+        event = events[event_id]
+        # The event's ads_fee counts towards the total once it has at least one order
+        previous = await collection.find_one_and_update(
+            {"key": key},
+            {"$inc": inc, "$setOnInsert": {"kind": "event", "ads_fee": event.ads_fee or 0, "live_selling_event_id": event_id}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if not previous or not previous.get("order_count"):
+            ads_fee += event.ads_fee or 0
+    if ads_fee:
+        buckets[TOTAL_KEY][1]["ads_fee"] = ads_fee
+    ops = [
+        UpdateOne({"key": key}, {"$inc": inc, "$setOnInsert": {"kind": kind}}, upsert=True)
+        for key, (kind, inc) in buckets.items()
+    ]
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+
+async def record_status_change(order, old_status, new_status):
+    if old_status == new_status:
+        return
+    inc = {f"status_counts.{old_status}": -1, f"status_counts.{new_status}": 1}
+    await _collection().update_many(
+        {"key": {"$in": [key for _, key in _order_buckets(order)]}},
+        {"$inc": inc},
+    )
+
+async def record_product_created(product):
+    await record_products_created([product])
+
+async def record_products_created(products):
+    registered = [p.registration_date.toordinal() for p in products if p.registration_date]
+    if registered:
+        await _collection().update_one(
+            {"key": INVENTORY_KEY},
+            {"$inc": {"product_count": len(registered), "registration_ordinal_sum": sum(registered)}, "$setOnInsert": {"kind": "inventory"}},
+            upsert=True,
+        )
+
+async def record_product_deleted(product):
+    await record_products_deleted([product])
+
+async def record_products_deleted(products):
+    # Past orders keep the cost they were sold at; only the top products
+    # list and the inventory figures drop the deleted products
+    if not products:
+        return
+    collection = _collection()
+    ids = [str(p.id) for p in products]
+    ops = []
+    query = {"$or": [{f"product_units.{pid}": {"$exists": True}} for pid in ids]}
+    async for doc in collection.find(query, {"product_units": 1}):
+        units = doc.get("product_units", {})
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$unset": {f"product_units.{pid}": "" for pid in ids if pid in units}},
+        ))
+    registered = [p.registration_date.toordinal() for p in products if p.registration_date]
+    if registered:
+        ops.append(UpdateOne(
+            {"key": INVENTORY_KEY},
+            {"$inc": {"product_count": -len(registered), "registration_ordinal_sum": -sum(registered)}},
+        ))
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+
+async def record_event_deleted(event):
+    collection = _collection()
+    doc = await collection.find_one_and_delete({"key": f"event:{event.id}"})
+    if doc and doc.get("order_count"):
+        await collection.update_one({"key": TOTAL_KEY}, {"$inc": {"ads_fee": -(doc.get("ads_fee") or 0)}})
+
+async def record_stock_change(units, ordinal_sum):
+    # Kept by inventory_ledger as movements change the FIFO positions; only
+    # once build_positions has set the starting totals
+    await _collection().update_one(
+        {"key": INVENTORY_KEY, "stock_units": {"$exists": True}},
+        {"$inc": {"stock_units": units, "stock_ordinal_sum": ordinal_sum}},
+    )
+
+async def set_stock_totals(units, ordinal_sum):
+    await _collection().update_one(
+        {"key": INVENTORY_KEY},
+        {"$set": {"stock_units": units, "stock_ordinal_sum": ordinal_sum}, "$setOnInsert": {"kind": "inventory"}},
+        upsert=True,
+    )
+    await change_versions.bump(change_versions.ROLLUPS)
+
+async def has_stock_totals():
+    return await _collection().find_one({"key": INVENTORY_KEY, "stock_units": {"$exists": True}}, {"_id": 1}) is not None
+
+def summarize(total, inventory, today=None):
+    total = total or {}
+    inventory = inventory or {}
+    today = today or date.today()
+    total_cost = (total.get("base_cost") or 0) + (total.get("ads_fee") or 0)
+    product_count = inventory.get("product_count") or 0
+    # The ledger's age of the units actually in stock; until the positions
+    # are built, fall back to product registration dates
+    if inventory.get("stock_units") is not None:
+        units = inventory["stock_units"]
+        average_days_in_inventory = today.toordinal() - inventory["stock_ordinal_sum"] / units if units else 0
+    else:
+        average_days_in_inventory = (
+            today.toordinal() - inventory.get("registration_ordinal_sum", 0) / product_count
+            if product_count else 0
+        )
+    return {
+        "total_revenue": total.get("revenue") or 0.0,
+        "total_profit": (total.get("revenue") or 0.0) - total_cost,
+        "order_count": total.get("order_count") or 0,
+        "average_days_in_inventory": average_days_in_inventory,
+        "orders_by_status": {k: v for k, v in (total.get("status_counts") or {}).items() if v},
+    }
+
+async def read_summary():
+    docs = {}
+    async for doc in _collection().find({"key": {"$in": [TOTAL_KEY, INVENTORY_KEY]}}):
+        docs[doc["key"]] = doc
+    return summarize(docs.get(TOTAL_KEY), docs.get(INVENTORY_KEY))
+
+async def breakdown(days, channels, top_products):
+    # Chart series for the analytics page: (sold_date, revenue, orders) per
+    # day, (channel, revenue, orders) per channel, (product_id, quantity) top products
+    from models.product import Product
+
+    ids = [ObjectId(pid) for pid, _ in top_products if ObjectId.is_valid(pid)]
+    names = {str(p["_id"]): p.get("name") async for p in Product.get_motor_collection().find({"_id": {"$in": ids}}, {"name": 1})}
+    return {
+        "by_day": [{"sold_date": _iso(day), "revenue": revenue, "orders": orders} for day, revenue, orders in days if day],
+        "by_channel": [{"channel": channel, "revenue": revenue, "orders": orders} for channel, revenue, orders in channels],
+        "top_products": [{"product_id": pid, "name": names.get(pid), "quantity": quantity} for pid, quantity in top_products],
+    }
+
+async def read_breakdown(top_n=5):
+    days, channels = [], []
+    units = {}
+    async for doc in _collection().find({"kind": {"$in": ["day", "channel", "total"]}}):
+        if doc["kind"] == "day":
+            days.append((doc["key"][len("day:"):], doc.get("revenue") or 0.0, doc.get("order_count") or 0))
+        elif doc["kind"] == "channel":
+            channels.append((doc["key"][len("channel:"):], doc.get("revenue") or 0.0, doc.get("order_count") or 0))
+        else:
+            units = doc.get("product_units") or {}
+    days = sorted((day, revenue, orders) for day, revenue, orders in days if day != "none" and orders)
+    channels = [c for c in channels if c[2]]
+    top = sorted(((pid, qty) for pid, qty in units.items() if qty > 0), key=lambda item: (-item[1], item[0]))[:top_n]
+    return await breakdown(days, channels, top)
+
+async def read_inventory():
+    return await _collection().find_one({"key": INVENTORY_KEY})
+
+def _apply(buckets, kind, key, inc, extra=None):
+    doc = buckets.setdefault(key, {"key": key, "kind": kind, **(extra or {})})
+    for field, value in inc.items():
+        if "." in field:
+            parent, child = field.split(".", 1)
+            sub = doc.setdefault(parent, {})
+            sub[child] = sub.get(child, 0) + value
+        else:
+            doc[field] = doc.get(field, 0) + value
+
+async def _all_orders():
+    import archive
+    from models.order import Order
+
+    async for order in Order.find_all():
+        yield order
+    async for doc in archive.find_orders({}):
+        yield Order.model_validate(doc)
+
+async def rebuild():
+    from models.product import Product
+    from models.order import Order
+    from models.live_event import LiveSellingEvent
+    import inventory_ledger
+
+    products = await Product.find_all().to_list()
+    product_lookup = {str(p.id): p for p in products}
+    events = await LiveSellingEvent.find_all().to_list()
+    event_lookup = {str(e.id): e for e in events}
+
+    buckets = {}
+    _apply(buckets, "total", TOTAL_KEY, {"order_count": 0})
+    async for order in _all_orders():
+        inc = order_increments(order, product_lookup)
+        event = event_lookup.get(order.live_selling_event_id) if order.live_selling_event_id else None
+        for kind, key in _order_buckets(order, with_event=False):
+            _apply(buckets, kind, key, inc)
+        if event:
+            _apply(buckets, "event", f"event:{order.live_selling_event_id}", inc,
+                   {"ads_fee": event.ads_fee or 0, "live_selling_event_id": order.live_selling_event_id})
+    buckets[TOTAL_KEY]["ads_fee"] = sum(
+        doc.get("ads_fee") or 0 for doc in buckets.values() if doc["kind"] == "event"
+    )
+    for p in products:
+        if p.registration_date:
+            _apply(buckets, "inventory", INVENTORY_KEY, {"product_count": 1, "registration_ordinal_sum": p.registration_date.toordinal()})
+
+    # Each bucket is overwritten in place, so readers never see the rollups
+    # empty; buckets that no longer have any orders are removed afterwards.
+    # Orders written while the scan runs can still be missed, so rebuild when
+    # writes are quiet.
+    collection = _collection()
+    ops = [
+        UpdateOne({"key": key}, {"$set": {k: v for k, v in doc.items() if k != "key"}}, upsert=True)
+        for key, doc in buckets.items()
+    ]
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+    await collection.delete_many({"key": {"$nin": list(buckets)}})
+    await inventory_ledger.build_positions()
+    # Cached /analytics/ responses are stale now
+    await change_versions.bump(change_versions.ROLLUPS)
+    return len(buckets)
+
+if __name__ == "__main__":
+    # Recompute every rollup from the raw collections: python rollups.py rebuild
+    import asyncio
+    import sys
+    from database import init_db
+
+    async def _main():
+        await init_db()
+        count = await rebuild()
+        print(f"Rebuilt {count} analytics rollup documents")
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python rollups.py rebuild")
+    asyncio.run(_main())
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+
+from models.live_event import LiveSellingEvent
+from models.product import Product
+
+# Raw BSON document -> response row conversion, shared by the list endpoints
+# and the exports. Rows match OrderResponse / ProductResponse /
+# LiveSellingEventResponse field for field, built in one pass without
+# constructing Beanie documents or response models.
+
+ORDER_FIELDS = [
+    "order_id", "sold_date", "status", "sales_channel", "products", "revenue",
+    "shopee_fee", "shipping_fee", "seller_coupon", "total_cost", "profit", "live_selling_event_id",
+]
+PRODUCT_FIELDS = [
+    "product_id", "name", "purchase_price", "shipping_fee", "purchase_date", "registration_date",
+    "start_quantity", "remaining_quantity", "supplier_id",
+]
+
+# Only what the rows need is read from MongoDB
+ORDER_PROJECTION = {
+    "sold_date": 1, "status": 1, "sales_channel": 1, "products.product_id": 1, "products.quantity": 1,
+    "revenue": 1, "shopee_fee": 1, "shipping_fee": 1, "seller_coupon": 1, "total_cost": 1,
+    "profit": 1, "base_cost": 1, "live_selling_event_id": 1,
+}
+PRODUCT_PROJECTION = {field: 1 for field in PRODUCT_FIELDS if field != "product_id"}
+SEARCH_PROJECTION = {"name": 1, "purchase_price": 1, "shipping_fee": 1, "remaining_quantity": 1}
+EVENT_PROJECTION = {"event_date": 1, "ads_fee": 1, "notes": 1, "order_count": 1}
+
+def _date(value):
+    return value.date().isoformat() if isinstance(value, datetime) else value
+
+def _float(value):
+    return float(value) if value is not None else None
+
+async def ads_fee_shares(event_ids=None):
+    # Per-order ads_fee share for the given events, or for every event
+    query = {} if event_ids is None else {"_id": {"$in": list(event_ids)}}
+    shares = {}
+    async for doc in LiveSellingEvent.get_motor_collection().find(query, {"ads_fee": 1, "order_count": 1}):
+        shares[str(doc["_id"])] = (doc.get("ads_fee") or 0) / max(doc.get("order_count") or 0, 1)
+    return shares
+
+def order_row(doc, ads_fee_shares):
+    total_cost = doc.get("total_cost")
+    profit = doc.get("profit")
+    if doc.get("base_cost") is not None:
+        total_cost = doc["base_cost"] + ads_fee_shares.get(doc.get("live_selling_event_id"), 0.0)
+        profit = doc["revenue"] - total_cost
+    return {
+        "order_id": str(doc["_id"]),
+        "sold_date": _date(doc.get("sold_date")),
+        "status": doc.get("status"),
+        "sales_channel": doc.get("sales_channel"),
+        "products": [{"product_id": i["product_id"], "quantity": i["quantity"]} for i in doc.get("products", [])],
+        "revenue": _float(doc.get("revenue")),
+        "shopee_fee": _float(doc.get("shopee_fee")),
+        "shipping_fee": _float(doc.get("shipping_fee")),
+        "seller_coupon": _float(doc.get("seller_coupon")),
+        "total_cost": _float(total_cost),
+        "profit": _float(profit),
+        "live_selling_event_id": doc.get("live_selling_event_id"),
+    }
+
+async def order_rows(docs):
+    # Order rows for a page of documents, with each event's current ads_fee
+    # share and the names of the products they contain, in two queries
+    event_ids = {ObjectId(d["live_selling_event_id"]) for d in docs if ObjectId.is_valid(d.get("live_selling_event_id") or "")}
+    product_ids = {ObjectId(i["product_id"]) for d in docs for i in d.get("products", []) if ObjectId.is_valid(i["product_id"])}
+
+    async def shares():
+        return await ads_fee_shares(event_ids) if event_ids else {}
+
+    async def names():
+        if not product_ids:
+            return {}
+        cursor = Product.get_motor_collection().find({"_id": {"$in": list(product_ids)}}, {"name": 1})
+        return {str(p["_id"]): p.get("name") async for p in cursor}
+
+    shares, product_names = await asyncio.gather(shares(), names())
+    # Product names ride along so pages don't need the full product list
+    return [
+        {**order_row(d, shares), "product_names": {i["product_id"]: product_names.get(i["product_id"]) for i in d.get("products", [])}}
+        for d in docs
+    ]
+
+def product_row(doc):
+    return {
+        "product_id": str(doc["_id"]),
+        "name": doc.get("name"),
+        "purchase_price": _float(doc.get("purchase_price")),
+        "shipping_fee": _float(doc.get("shipping_fee")),
+        "purchase_date": _date(doc.get("purchase_date")),
+        "registration_date": _date(doc.get("registration_date")),
+        "start_quantity": doc.get("start_quantity"),
+        "remaining_quantity": doc.get("remaining_quantity"),
+        "supplier_id": doc.get("supplier_id"),
+    }
+
+def search_row(doc):
+    # Just what the order form's product picker shows
+    return {
+        "product_id": str(doc["_id"]),
+        "name": doc.get("name"),
+        "purchase_price": _float(doc.get("purchase_price")),
+        "shipping_fee": _float(doc.get("shipping_fee")),
+        "remaining_quantity": doc.get("remaining_quantity"),
+    }
+
+def event_row(doc):
+    return {
+        "event_id": str(doc["_id"]),
+        "event_date": _date(doc.get("event_date")),
+        "ads_fee": _float(doc.get("ads_fee")),
+        "notes": doc.get("notes"),
+        "order_count": doc.get("order_count") or 0,
+    }
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from models.order import Order
+from models.schemas import OrderResponse
+import rows
+
+# CPU cost of turning one /orders/ page into JSON, without the database round
+# trip: python rows_bench.py [rows] [runs]
+#   models - Beanie document, then OrderResponse, then response_model
+#            validation and jsonable_encoder, as /orders/ worked before rows.py
+#   rows   - raw document -> rows.order_row -> orjson, as /orders/ works now
+# Needs MONGODB_URL only because Beanie must be initialised to build documents.
+
+def raw_orders(count):
+    # Shaped like what Motor returns for rows.ORDER_PROJECTION
+    products = [str(ObjectId()) for _ in range(20)]
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "sold_date": start + timedelta(days=i % 365),
+            "status": "delivered",
+            "sales_channel": "shopee",
+            "products": [{"product_id": products[(i + j) % len(products)], "quantity": 1 + j} for j in range(2)],
+            "revenue": 250.0, "shopee_fee": 12.5, "shipping_fee": 30.0, "seller_coupon": 5.0,
+            "total_cost": 180.0, "profit": 70.0, "base_cost": 180.0, "live_selling_event_id": None,
+        }
+        for i in range(count)
+    ]
+
+ITEMS = TypeAdapter(List[OrderResponse])
+
+def models_page(docs):
+    items = [OrderResponse.from_order(Order.model_validate(doc)) for doc in docs]
+    # What response_model validation did with the returned list
+    items = ITEMS.validate_python([i.model_dump() for i in items])
+    return JSONResponse(jsonable_encoder({"items": items, "next_cursor": None})).body
+
+def rows_page(docs):
+    return ORJSONResponse({"items": [rows.order_row(doc, {}) for doc in docs], "next_cursor": None}).body
+
+def average_ms(render, docs, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        render(docs)
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times) * 1000
+
+if __name__ == "__main__":
+    from database import init_db
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    asyncio.run(init_db())
+    docs = raw_orders(count)
+    # Both paths must produce the same page
+    assert json.loads(models_page(docs[:10])) == json.loads(rows_page(docs[:10]))
+    print(f"{count} orders, average of {runs} runs")
+    print(f"models: {average_ms(models_page, docs, runs):.0f} ms")
+    print(f"rows:   {average_ms(rows_page, docs, runs):.0f} ms")
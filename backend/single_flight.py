@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Request coalescing for the expensive read endpoints. Concurrent requests for
+# the same endpoint, parameters and change versions (the ETag) share one
+# in-flight computation instead of each running its own queries. With
+# READ_STALE_SECONDS > 0 the last result per endpoint and parameters is also
+# kept: once a write makes it outdated it is still served, with its own ETag,
+# for up to that many seconds after it was computed while a single background
+# task computes the new one. Each worker coalesces only its own requests.
+
+STALE_SECONDS = float(os.getenv("READ_STALE_SECONDS", "0"))
+MAX_RESULTS = int(os.getenv("READ_RESULT_CACHE_SIZE", "256"))
+
+def make_key(name, **params):
+    return name + ":" + json.dumps(params, sort_keys=True, default=str)
+
+class SingleFlight:
+    def __init__(self, stale_seconds: float = STALE_SECONDS, maxsize: int = MAX_RESULTS):
+        self.stale_seconds = stale_seconds
+        self.maxsize = maxsize
+        self._in_flight = {}
+        self._results = OrderedDict()
+        self.requests = {}
+        self.refresh_errors = 0
+
+    def _count(self, name, outcome):
+        key = (name, outcome)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def _store(self, key, etag, value):
+        if not self.stale_seconds:
+            return
+        self._results[key] = (etag, value, time.monotonic())
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def _start(self, key, etag, compute):
+        # The computation runs as its own task, so a client that disconnects
+        # doesn't cancel it for the others waiting on it
+        async def run():
+            try:
+                value = await compute()
+                self._store(key, etag, value)
+                return value
+            finally:
+                self._in_flight.pop((key, etag), None)
+        task = asyncio.ensure_future(run())
+        self._in_flight[(key, etag)] = task
+        return task
+
+    def _refresh(self, key, etag, compute):
+        if (key, etag) in self._in_flight:
+            return
+        task = self._start(key, etag, compute)
+
+        def done(task):
+            if task.cancelled() or task.exception() is not None:
+                self.refresh_errors += 1
+        task.add_done_callback(done)
+
+    async def get(self, name, key, etag, compute):
+        # Returns (etag, value); the etag is the stored result's when a stale one is served
+        stored = self._results.get(key)
+        if stored:
+            stored_etag, value, computed_at = stored
+            if stored_etag == etag:
+                self._count(name, "cached")
+                return etag, value
+            if time.monotonic() - computed_at <= self.stale_seconds:
+                self._refresh(key, etag, compute)
+                self._count(name, "stale")
+                return stored_etag, value
+        task = self._in_flight.get((key, etag))
+        if task:
+            self._count(name, "coalesced")
+        else:
+            task = self._start(key, etag, compute)
+            self._count(name, "computed")
+        return etag, await asyncio.shield(task)
+
+    def render_metrics(self):
+        lines = [
+            "# HELP read_requests_total Coalesced read endpoint requests by how they were answered.",
+            "# TYPE read_requests_total counter",
+        ]
+        for (name, outcome), count in sorted(self.requests.items()):
+            lines.append(f'read_requests_total{{endpoint="{name}",outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP read_computations_in_flight Shared read computations currently running.",
+            "# TYPE read_computations_in_flight gauge",
+            f"read_computations_in_flight {len(self._in_flight)}",
+            "# HELP read_refresh_errors_total Background stale-while-revalidate refreshes that failed.",
+            "# TYPE read_refresh_errors_total counter",
+            f"read_refresh_errors_total {self.refresh_errors}",
+        ]
+        return "\n".join(lines) + "\n"
+
+reads = SingleFlight()
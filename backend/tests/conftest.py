@@ -0,0 +1,77 @@
+import os
+import sys
+import uuid
+
+import httpx
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from auth import create_access_token
+from db_stats import QueryStatsListener
+from models.order import Order
+
+# Tests run against the mongod at MONGODB_URL (CI starts one) in a throwaway
+# database, or against mongomock-motor when none is reachable. Tests that
+# need real server behaviour, like command monitoring, request the mongod
+# fixture and are skipped without one.
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017/product_tracking")
+
+def _mongod_reachable():
+    try:
+        MongoClient(MONGODB_URL, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+MONGOD = _mongod_reachable()
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def mongod():
+    if not MONGOD:
+        pytest.skip(f"no mongod reachable at {MONGODB_URL}")
+
+@pytest.fixture
+async def db(monkeypatch):
+    if MONGOD:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[QueryStatsListener()])
+        test_db = client[f"product_tracking_test_{uuid.uuid4().hex[:12]}"]
+        await database.init_db(test_db)
+        yield test_db
+        await client.drop_database(test_db.name)
+        client.close()
+        return
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    # mongomock ignores partialFilterExpression, which would make the import
+    # key index reject every order without one
+    monkeypatch.setattr(Order.Settings, "indexes", [
+        index for index in Order.Settings.indexes if "partialFilterExpression" not in index.document
+    ])
+    test_db = mongomock_motor.AsyncMongoMockClient()["product_tracking_test"]
+    await database.init_db(test_db)
+    yield test_db
+
+@pytest.fixture
+async def client(db):
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "FernSudCute"})}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as c:
+        yield c
+
+async def create_products(client, *quantities, **fields):
+    items = [{"name": f"Product {i}", "purchase_price": 10, "start_quantity": q, **fields} for i, q in enumerate(quantities)]
+    response = await client.post("/products/bulk", json=items)
+    assert response.status_code == 200
+    return [r["product_id"] for r in response.json()]
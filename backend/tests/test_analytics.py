@@ -0,0 +1,84 @@
+import pytest
+from bson import ObjectId
+
+import archive
+import live_events
+from conftest import create_products
+from models.live_event import LiveSellingEvent
+
+pytestmark = pytest.mark.anyio
+
+async def test_order_profits_add_up_to_analytics_total(client):
+    a, b = await create_products(client, 20, 20, shipping_fee=7)
+    event = (await client.post("/live_events/", json={"ads_fee": 90})).json()
+    orders = [
+        {"products": [{"product_id": a, "quantity": 2}], "sales_channel": "shopee", "revenue": 100,
+         "shopee_fee": 5, "shipping_fee": 3, "seller_coupon": 4},
+        {"products": [{"product_id": a, "quantity": 1}, {"product_id": b, "quantity": 3}], "sales_channel": "live_selling",
+         "revenue": 80, "live_selling_event_id": event["event_id"]},
+        {"products": [{"product_id": b, "quantity": 1}], "sales_channel": "live_selling",
+         "revenue": 30, "seller_coupon": 2, "live_selling_event_id": event["event_id"]},
+    ]
+    for order in orders:
+        assert (await client.post("/orders/", json=order)).status_code == 200
+    # The first event order's ads_fee share has dropped from 90 to 45 since it was saved
+    rows = (await client.get("/orders/")).json()["items"]
+    summary = (await client.get("/analytics/")).json()
+    assert sum(r["profit"] for r in rows) == pytest.approx(summary["total_profit"])
+    assert sum(r["revenue"] for r in rows) == pytest.approx(summary["total_revenue"])
+    single = await client.get(f"/orders/{rows[-1]['order_id']}")
+    assert single.json()["profit"] == pytest.approx(rows[-1]["profit"])
+    # Past orders keep the cost they were sold at when a product goes away
+    assert (await client.delete(f"/products/{a}")).status_code == 200
+    after = (await client.get("/orders/")).json()["items"]
+    assert [r["profit"] for r in after] == pytest.approx([r["profit"] for r in rows])
+    assert (await client.get("/analytics/")).json()["total_profit"] == pytest.approx(summary["total_profit"])
+
+async def test_seller_coupon_and_product_shipping_are_costs(client):
+    [pid] = await create_products(client, 10, shipping_fee=5)
+    order = {"products": [{"product_id": pid, "quantity": 4}], "sales_channel": "shopee",
+             "revenue": 100, "seller_coupon": 20}
+    created = (await client.post("/orders/", json=order)).json()
+    # 100 - (4 * 10 + 5) - 20
+    assert created["profit"] == pytest.approx(35)
+    assert (await client.get("/analytics/")).json()["total_profit"] == pytest.approx(35)
+
+async def seed_archived_month(client):
+    [pid] = await create_products(client, 50)
+    old = {"products": [{"product_id": pid, "quantity": 2}], "sales_channel": "shopee", "revenue": 40,
+           "sold_date": "2020-03-05", "status": "delivered"}
+    recent = {"products": [{"product_id": pid, "quantity": 1}], "sales_channel": "live_selling", "revenue": 25}
+    for order in (old, old, recent):
+        assert (await client.post("/orders/", json=order)).status_code == 200
+    assert await archive.archive_orders() == 2
+    return pid
+
+async def test_breakdown_includes_archived_orders(client):
+    pid = await seed_archived_month(client)
+    breakdown = (await client.get("/analytics/breakdown")).json()
+    by_day = {row["sold_date"]: row for row in breakdown["by_day"]}
+    assert by_day["2020-03-05"] == {"sold_date": "2020-03-05", "revenue": 80, "orders": 2}
+    assert {row["channel"]: row["orders"] for row in breakdown["by_channel"]} == {"shopee": 2, "live_selling": 1}
+    assert breakdown["top_products"] == [{"product_id": pid, "name": "Product 0", "quantity": 5}]
+
+async def test_filtered_breakdown_includes_archived_orders(mongod, client):
+    pid = await seed_archived_month(client)
+    breakdown = (await client.get("/analytics/breakdown", params={"end_date": "2020-12-31"})).json()
+    assert breakdown["by_day"] == [{"sold_date": "2020-03-05", "revenue": 80, "orders": 2}]
+    assert breakdown["by_channel"] == [{"channel": "shopee", "revenue": 80, "orders": 2}]
+    assert breakdown["top_products"] == [{"product_id": pid, "name": "Product 0", "quantity": 4}]
+
+async def test_event_order_counts_are_backfilled_from_hot_and_archived_orders(client):
+    [pid] = await create_products(client, 10)
+    event = (await client.post("/live_events/", json={"ads_fee": 90})).json()
+    line = {"products": [{"product_id": pid, "quantity": 1}], "sales_channel": "live_selling",
+            "revenue": 40, "live_selling_event_id": event["event_id"]}
+    for order in ({**line, "sold_date": "2020-03-05", "status": "delivered"}, line, line):
+        assert (await client.post("/orders/", json=order)).status_code == 200
+    assert await archive.archive_orders() == 1
+    # An event from before order_count existed
+    events = LiveSellingEvent.get_motor_collection()
+    await events.update_one({"_id": ObjectId(event["event_id"])}, {"$unset": {"order_count": ""}})
+    await live_events.backfill_order_counts()
+    doc = await events.find_one({"_id": ObjectId(event["event_id"])})
+    assert doc["order_count"] == 3
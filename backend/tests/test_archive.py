@@ -0,0 +1,78 @@
+import json
+from datetime import date
+
+import pytest
+from bson import ObjectId
+
+import archive
+from conftest import create_products
+from models.order import Order
+
+pytestmark = pytest.mark.anyio
+
+async def closed_order(client, pid, status="delivered"):
+    order = {"products": [{"product_id": pid, "quantity": 1}], "sales_channel": "shopee", "revenue": 10,
+             "sold_date": "2020-03-05", "status": status}
+    response = await client.post("/orders/", json=order)
+    assert response.status_code == 200
+    return response.json()["order_id"]
+
+async def archived_ids():
+    return [o["_id"] async for bucket in archive._collection().find() for o in bucket["orders"]]
+
+async def test_archive_moves_closed_orders(client):
+    [pid] = await create_products(client, 10)
+    ids = [await closed_order(client, pid) for _ in range(3)]
+    assert await archive.archive_orders() == 3
+    assert await Order.get_motor_collection().count_documents({}) == 0
+    assert sorted(await archived_ids()) == sorted(ObjectId(i) for i in ids)
+    assert (await client.get(f"/orders/{ids[0]}")).status_code == 200
+
+@pytest.mark.parametrize("new_status", ["shipped", "cancelled"])
+async def test_status_change_during_archive_is_kept(client, monkeypatch, new_status):
+    [pid] = await create_products(client, 10)
+    changed, untouched = await closed_order(client, pid), await closed_order(client, pid)
+    collection = archive._collection()
+    patched = []
+
+    class ChangeAfterCopy:
+        # A PATCH that lands after the first copy and before its delete
+        def __getattr__(self, name):
+            return getattr(collection, name)
+
+        async def bulk_write(self, ops, **kwargs):
+            result = await collection.bulk_write(ops, **kwargs)
+            if not patched:
+                patched.append(await client.patch(f"/orders/{changed}", json={"status": new_status}))
+            return result
+
+    monkeypatch.setattr(archive, "_collection", lambda: ChangeAfterCopy())
+    archived = await archive.archive_orders()
+    assert patched[0].status_code == 200
+    buckets = await collection.find().to_list(length=None)
+    copies = [o for bucket in buckets for o in bucket["orders"]]
+    assert sum(bucket["order_count"] for bucket in buckets) == len(copies)
+    if new_status == "shipped":
+        # Reopened, so it stays hot and its copy is gone again
+        assert archived == 1
+        hot = await Order.get_motor_collection().find_one({"_id": ObjectId(changed)})
+        assert hot["status"] == "shipped"
+        assert [o["_id"] for o in copies] == [ObjectId(untouched)]
+    else:
+        # Still closed, so a later batch archives it with the new status
+        assert archived == 2
+        assert await Order.get_motor_collection().count_documents({}) == 0
+        assert {o["_id"]: o["status"] for o in copies} == {ObjectId(untouched): "delivered", ObjectId(changed): "cancelled"}
+
+async def test_order_export_merges_archived_orders_by_date(client):
+    [pid] = await create_products(client, 10)
+    for sold_date, status in [("2019-06-01", "pending"), ("2020-03-05", "delivered"), ("2020-01-10", "cancelled"), (None, "pending")]:
+        order = {"products": [{"product_id": pid, "quantity": 1}], "sales_channel": "shopee", "revenue": 10, "status": status}
+        if sold_date:
+            order["sold_date"] = sold_date
+        assert (await client.post("/orders/", json=order)).status_code == 200
+    assert await archive.archive_orders() == 2
+    response = await client.get("/orders/export", params={"format": "ndjson"})
+    dates = [json.loads(line)["sold_date"][:10] for line in response.text.splitlines()]
+    # An open order can be older than archived ones
+    assert dates == [date.today().isoformat(), "2020-03-05", "2020-01-10", "2019-06-01"]
@@ -0,0 +1,47 @@
+import pytest
+
+from conftest import create_products
+
+pytestmark = pytest.mark.anyio
+
+ENDPOINTS = ["/orders/", "/products/", "/live_events/", "/analytics/"]
+
+async def etags(client):
+    tags = {}
+    for path in ENDPOINTS:
+        response = await client.get(path)
+        assert response.status_code == 200, path
+        tags[path] = response.headers["ETag"]
+    return tags
+
+async def revalidate(client, tags):
+    return {path: (await client.get(path, headers={"If-None-Match": tags[path]})).status_code for path in ENDPOINTS}
+
+def expect(*changed):
+    return {path: 200 if path in changed else 304 for path in ENDPOINTS}
+
+async def test_conditional_reads_change_only_with_their_writes(client):
+    [pid] = await create_products(client, 10)
+    tags = await etags(client)
+    assert await revalidate(client, tags) == expect()
+
+    order = {"products": [{"product_id": pid, "quantity": 1}], "sales_channel": "shopee", "revenue": 50}
+    order_id = (await client.post("/orders/", json=order)).json()["order_id"]
+    assert await revalidate(client, tags) == expect("/orders/", "/products/", "/analytics/")
+
+    tags = await etags(client)
+    assert (await client.patch(f"/orders/{order_id}", json={"status": "shipped"})).status_code == 200
+    assert await revalidate(client, tags) == expect("/orders/", "/analytics/")
+
+    tags = await etags(client)
+    assert (await client.post(f"/products/{pid}/restock", json={"quantity": 5})).status_code == 200
+    assert await revalidate(client, tags) == expect("/orders/", "/products/", "/analytics/")
+
+    tags = await etags(client)
+    event = (await client.post("/live_events/", json={"ads_fee": 30})).json()
+    assert await revalidate(client, tags) == expect("/orders/", "/live_events/", "/analytics/")
+
+    tags = await etags(client)
+    assert (await client.delete(f"/live_events/{event['event_id']}")).status_code == 200
+    assert await revalidate(client, tags) == expect("/orders/", "/live_events/", "/analytics/")
+    assert await revalidate(client, await etags(client)) == expect()
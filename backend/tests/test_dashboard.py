@@ -0,0 +1,26 @@
+import pytest
+
+import rollups
+from conftest import create_products
+
+pytestmark = pytest.mark.anyio
+
+async def test_dashboard_reads_the_rollup_summary_once(client, monkeypatch):
+    [pid] = await create_products(client, 5)
+    order = {"products": [{"product_id": pid, "quantity": 2}], "sales_channel": "shopee", "revenue": 40}
+    assert (await client.post("/orders/", json=order)).status_code == 200
+    calls = []
+    read_summary = rollups.read_summary
+
+    async def counted():
+        calls.append(1)
+        return await read_summary()
+
+    monkeypatch.setattr(rollups, "read_summary", counted)
+    data = (await client.get("/dashboard")).json()
+    assert len(calls) == 1
+    assert data["counts"] == {"products": 1, "orders": 1}
+    assert data["analytics"]["order_count"] == 1
+    # Sections that don't need it don't read it
+    assert (await client.get("/dashboard", params={"fields": "low_stock,recent_orders"})).status_code == 200
+    assert len(calls) == 1
@@ -0,0 +1,16 @@
+import pytest
+
+import database
+from models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+async def test_startup_keeps_operator_indexes(db):
+    await db["products"].create_index([("supplier_id", 1)], name="operator_supplier")
+    await database.init_db(db)
+    assert "operator_supplier" in await db["products"].index_information()
+    # Only an explicit reconcile drops it
+    await database.init_db(db, allow_index_dropping=True)
+    indexes = await db["products"].index_information()
+    assert "operator_supplier" not in indexes
+    assert len(indexes) == 1 + len(Product.Settings.indexes)
@@ -0,0 +1,75 @@
+import pytest
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+import imports
+from conftest import create_products
+from models.live_event import LiveSellingEvent
+from models.order import Order
+from models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+async def remaining(product_id):
+    doc = await Product.get_motor_collection().find_one({"_id": ObjectId(product_id)})
+    return doc["remaining_quantity"], doc.get("pending_reservations", [])
+
+async def iter_chunks(text):
+    yield text.encode()
+
+async def test_import_writes_every_row(client):
+    [pid] = await create_products(client, 10)
+    body = "".join(f'{{"products": [{{"product_id": "{pid}", "quantity": 2}}], "sales_channel": "shopee", "revenue": 50}}\n' for _ in range(3))
+    result = (await client.post("/orders/import", params={"format": "ndjson"}, content=body)).json()
+    assert result["imported"] == 3 and result["errors"] == []
+    assert await remaining(pid) == (4, [])
+
+async def test_rows_that_fail_to_insert_give_back_stock(client, monkeypatch):
+    [pid] = await create_products(client, 10)
+    event = (await client.post("/live_events/", json={"ads_fee": 30})).json()
+    ids = [PydanticObjectId() for _ in range(3)]
+    # The second row's id is already taken, so only that insert fails
+    await Order.get_motor_collection().insert_one({"_id": ids[1]})
+    assigned = iter(ids)
+    monkeypatch.setattr(imports, "PydanticObjectId", lambda: next(assigned))
+    line = f'{{"products": [{{"product_id": "{pid}", "quantity": 2}}], "sales_channel": "live_selling", "revenue": 50, "live_selling_event_id": "{event["event_id"]}"}}\n'
+    response = await client.post("/orders/import", params={"format": "ndjson"}, content=line * 3)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["order_ids"] == [str(ids[0]), str(ids[2])]
+    assert [e["row"] for e in result["errors"]] == [2]
+    # Stock and the event's order count only reflect the two written rows
+    assert await remaining(pid) == (6, [])
+    doc = await LiveSellingEvent.get_motor_collection().find_one({"_id": ObjectId(event["event_id"])})
+    assert doc["order_count"] == 2
+
+async def test_rows_imported_cancelled_take_no_stock(client):
+    [pid] = await create_products(client, 10)
+    line = '{{"products": [{{"product_id": "{}", "quantity": 4}}], "sales_channel": "shopee", "revenue": 50, "status": "{}"}}\n'
+    body = line.format(pid, "cancelled") + line.format(pid, "pending")
+    result = (await client.post("/orders/import", params={"format": "ndjson"}, content=body)).json()
+    assert result["imported"] == 2 and result["errors"] == []
+    assert await remaining(pid) == (6, [])
+    assert (await client.patch(f"/orders/{result['order_ids'][0]}", json={"status": "pending"})).status_code == 200
+    assert await remaining(pid) == (2, [])
+
+async def test_insert_failing_part_way_gives_back_stock_for_unwritten_rows(client, monkeypatch):
+    [pid] = await create_products(client, 10)
+    event = (await client.post("/live_events/", json={"ads_fee": 30})).json()
+    insert_many = Order.insert_many
+
+    async def insert_first_then_fail(docs, **kwargs):
+        await insert_many(docs[:1], **kwargs)
+        raise AutoReconnect("connection lost")
+
+    monkeypatch.setattr(Order, "insert_many", insert_first_then_fail)
+    line = f'{{"products": [{{"product_id": "{pid}", "quantity": 2}}], "sales_channel": "live_selling", "revenue": 50, "live_selling_event_id": "{event["event_id"]}"}}\n'
+    with pytest.raises(AutoReconnect):
+        await imports.import_orders(iter_chunks(line * 3), "ndjson")
+    # Only the written row keeps its stock, event count and rollup entry
+    assert await remaining(pid) == (8, [])
+    doc = await LiveSellingEvent.get_motor_collection().find_one({"_id": ObjectId(event["event_id"])})
+    assert doc["order_count"] == 1
+    assert (await client.get("/analytics/")).json()["order_count"] == 1
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+import inventory_ledger
+import rollups
+from conftest import create_products
+from models.inventory_position import InventoryPosition
+from models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+async def average_age():
+    return (await rollups.read_summary())["average_days_in_inventory"]
+
+async def test_average_age_is_kept_up_to_date_without_ledger_reads(client, monkeypatch):
+    # A product from before the ledger: its stock dates from registration
+    registered = datetime(2024, 1, 1)
+    legacy = await Product.get_motor_collection().insert_one({
+        "name": "Legacy", "name_key": "legacy", "purchase_price": 5, "start_quantity": 4,
+        "remaining_quantity": 4, "registration_date": registered,
+    })
+    [fresh] = await create_products(client, 10)
+    await inventory_ledger.build_positions()
+
+    order = {"products": [{"product_id": str(legacy.inserted_id), "quantity": 3}], "sales_channel": "shopee", "revenue": 30}
+    order_id = (await client.post("/orders/", json=order)).json()["order_id"]
+    assert (await client.post(f"/products/{fresh}/restock", json={"quantity": 5})).status_code == 200
+
+    async def no_ledger_reads(*args, **kwargs):
+        raise AssertionError("read the ledger")
+
+    monkeypatch.setattr(inventory_ledger, "_movements_between", no_ledger_reads)
+    today = date.today().toordinal()
+    # FIFO: 1 legacy unit left from registration, 15 fresh units from today
+    assert await average_age() == pytest.approx(today - (registered.toordinal() + 15 * today) / 16)
+
+    # Cancelling returns 3 units received today
+    assert (await client.patch(f"/orders/{order_id}", json={"status": "cancelled"})).status_code == 200
+    incremental = await average_age()
+    assert incremental == pytest.approx(today - (registered.toordinal() + 18 * today) / 19)
+    monkeypatch.undo()
+    await inventory_ledger.build_positions()
+    assert await average_age() == pytest.approx(incremental)
+
+async def test_age_falls_back_to_registration_until_positions_are_built(client):
+    await create_products(client, 2, registration_date="2024-01-01")
+    expected = date.today().toordinal() - date(2024, 1, 1).toordinal()
+    assert await average_age() == pytest.approx(expected)
+    assert not await rollups.has_stock_totals()
+    await inventory_ledger.ensure_positions()
+    assert await rollups.has_stock_totals()
+    # The ledger dates the units from when they were entered
+    assert await average_age() == pytest.approx(0)
+
+async def test_snapshots_match_positions(client):
+    a, b = await create_products(client, 6, 3)
+    await inventory_ledger.build_positions()
+    order = {"products": [{"product_id": a, "quantity": 2}, {"product_id": b, "quantity": 3}], "sales_channel": "shopee", "revenue": 30}
+    assert (await client.post("/orders/", json=order)).status_code == 200
+    inventory = await rollups.read_inventory()
+    assert inventory["stock_units"] == 4
+    assert await inventory_ledger.take_snapshots() == 4
+    stock = (await client.get(f"/products/{a}/stock")).json()
+    assert stock["quantity"] == 4
+
+class SlowPositions:
+    # Lets a concurrent movement write the same position first
+    def __init__(self, collection, calls):
+        self.collection = collection
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def bulk_write(self, ops, **kwargs):
+        self.calls.append([op._filter["product_id"] for op in ops])
+        await asyncio.sleep(0.01)
+        return await self.collection.bulk_write(ops, **kwargs)
+
+async def test_concurrent_movements_retry_only_the_stale_positions(client, monkeypatch):
+    a, b = await create_products(client, 6, 3)
+    await inventory_ledger.build_positions()
+    calls = []
+    monkeypatch.setattr(inventory_ledger, "_positions", lambda: SlowPositions(InventoryPosition.get_motor_collection(), calls))
+    await asyncio.gather(
+        inventory_ledger.record({a: 5}, "restock"),
+        inventory_ledger.record({a: 2, b: 4}, "restock"),
+    )
+    # One bulk write per batch, plus a retry of just the product both touched
+    assert sorted(calls) == sorted([[a], [a, b], [a]])
+    positions = {p["product_id"]: p async for p in InventoryPosition.get_motor_collection().find()}
+    assert positions[a]["quantity"] == 13
+    assert positions[b]["quantity"] == 7
+    assert (await rollups.read_inventory())["stock_units"] == 20
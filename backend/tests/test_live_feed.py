@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from live_feed import LiveFeed, RESYNC_FRAME, _frame
+
+pytestmark = pytest.mark.anyio
+
+async def test_a_subscriber_that_never_reads_gets_one_resync_and_blocks_nobody():
+    feed = LiveFeed(queue_size=4)
+    stuck = feed.stream()
+    reader = feed.stream()
+    # The first frame registers each subscriber
+    assert await stuck.__anext__() == "retry: 3000\n\n"
+    assert await reader.__anext__() == "retry: 3000\n\n"
+    received = []
+
+    async def read():
+        for _ in range(6):
+            received.append(await reader.__anext__())
+
+    async def write():
+        for i in range(6):
+            feed.publish("order_status", {"i": i})
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(asyncio.gather(write(), read()), 1)
+    assert received == [_frame("order_status", {"i": i}) for i in range(6)]
+    # Four frames filled the stuck queue; the fifth dropped them for a resync
+    assert feed.resyncs == 1
+    assert await stuck.__anext__() == RESYNC_FRAME
+    assert await stuck.__anext__() == _frame("order_status", {"i": 5})
+    await stuck.aclose()
+    await reader.aclose()
+    assert not feed.subscribers
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from conftest import create_products
+
+pytestmark = pytest.mark.anyio
+
+def metric(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+async def test_db_command_counter_matches_commands_sent(mongod, client):
+    await create_products(client, 1, 2, 3)
+    # Products page: one change-version read, one products find
+    response = await client.get("/products/")
+    assert response.headers["X-DB-Query-Count"] == "2"
+    # A 304 stops after the change-version read
+    response = await client.get("/products/", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.headers["X-DB-Query-Count"] == "1"
+
+async def test_db_command_counter_is_per_request(mongod, client):
+    await create_products(client, 1, 2, 3)
+    series = 'http_request_db_commands_sum{method="GET",route="/products/"}'
+    before = metric((await client.get("/metrics")).text, series)
+    responses = await asyncio.gather(*(client.get("/products/", params={"limit": n}) for n in range(1, 21)))
+    # Concurrent requests don't see each other's commands
+    assert [r.headers["X-DB-Query-Count"] for r in responses] == ["2"] * 20
+    after = metric((await client.get("/metrics")).text, series)
+    assert after - before == 40
+
+async def test_metrics_without_mongod_still_count_requests(client):
+    series = 'http_request_duration_seconds_count{method="GET",route="/products/{product_id}/stock"}'
+    before = metric((await client.get("/metrics")).text, series)
+    [pid] = await create_products(client, 1)
+    await client.get(f"/products/{pid}/stock")
+    await client.get("/products/not-an-id/stock")
+    after = metric((await client.get("/metrics")).text, series)
+    assert after - before == 2
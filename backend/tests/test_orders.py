@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+import inventory
+from conftest import create_products
+from models.inventory_movement import InventoryMovement
+from models.order import Order
+from models.product import Product
+
+pytestmark = pytest.mark.anyio
+
+def order(*lines):
+    return {"products": [{"product_id": pid, "quantity": qty} for pid, qty in lines], "sales_channel": "shopee", "revenue": 100}
+
+async def stock(product_id):
+    doc = await Product.get_motor_collection().find_one({"_id": ObjectId(product_id)})
+    return doc["remaining_quantity"], doc.get("pending_reservations", [])
+
+async def test_concurrent_orders_never_oversell(client):
+    [pid] = await create_products(client, 5)
+    responses = await asyncio.gather(*(client.post("/orders/", json=order((pid, 1))) for _ in range(20)))
+    codes = [r.status_code for r in responses]
+    assert codes.count(200) == 5
+    assert all(code == 400 for code in codes if code != 200)
+    assert await stock(pid) == (0, [])
+    assert await Order.get_motor_collection().count_documents({}) == 5
+
+async def test_concurrent_multi_item_orders_keep_stock_consistent(client):
+    a, b = await create_products(client, 3, 3)
+    responses = await asyncio.gather(*(client.post("/orders/", json=order((a, 1), (b, 1))) for _ in range(10)))
+    sold = [r.status_code for r in responses].count(200)
+    # Two orders can each hold one product and both back off, so fewer may succeed
+    assert sold <= 3
+    assert all(r.status_code in (200, 400, 409) for r in responses)
+    assert await stock(a) == (3 - sold, [])
+    assert await stock(b) == (3 - sold, [])
+    assert await Order.get_motor_collection().count_documents({}) == sold
+
+async def test_partially_failing_order_rolls_back_reservations(client):
+    a, b = await create_products(client, 10, 1)
+    response = await client.post("/orders/", json=order((a, 2), (b, 5)))
+    assert response.status_code == 400
+    assert await stock(a) == (10, [])
+    assert await stock(b) == (1, [])
+    assert await Order.get_motor_collection().count_documents({}) == 0
+
+async def test_unknown_product_rolls_back_reservations(client):
+    [a] = await create_products(client, 10)
+    response = await client.post("/orders/", json=order((a, 2), (str(ObjectId()), 1)))
+    assert response.status_code == 404
+    assert await stock(a) == (10, [])
+
+async def test_order_rows_carry_product_names(client):
+    a, b = await create_products(client, 10, 10)
+    assert (await client.post("/orders/", json=order((a, 1), (b, 2)))).status_code == 200
+    [row] = (await client.get("/orders/")).json()["items"]
+    assert row["product_names"] == {a: "Product 0", b: "Product 1"}
+    # Deleted products keep their id with no name
+    assert (await client.delete(f"/products/{b}")).status_code == 200
+    [row] = (await client.get("/orders/")).json()["items"]
+    assert row["product_names"] == {a: "Product 0", b: None}
+
+async def test_concurrent_cancels_return_stock_once(client, monkeypatch):
+    [pid] = await create_products(client, 10)
+    order_id = (await client.post("/orders/", json=order((pid, 4)))).json()["order_id"]
+    return_stock = inventory.return_stock
+
+    async def slow_return_stock(quantities):
+        # Lets the other request read the order before this one finishes
+        await asyncio.sleep(0.01)
+        await return_stock(quantities)
+
+    monkeypatch.setattr(inventory, "return_stock", slow_return_stock)
+    responses = await asyncio.gather(*(client.patch(f"/orders/{order_id}", json={"status": "cancelled"}) for _ in range(2)))
+    assert sorted(r.status_code for r in responses) in ([200, 200], [200, 409])
+    assert await stock(pid) == (10, [])
+    assert await InventoryMovement.get_motor_collection().count_documents({"reason": "cancellation"}) == 1
+    summary = (await client.get("/analytics/")).json()
+    assert summary["orders_by_status"] == {"cancelled": 1}
+
+async def test_uncancel_without_stock_keeps_the_order_cancelled(client):
+    [pid] = await create_products(client, 3)
+    order_id = (await client.post("/orders/", json=order((pid, 3)))).json()["order_id"]
+    assert (await client.patch(f"/orders/{order_id}", json={"status": "cancelled"})).status_code == 200
+    assert (await client.post("/orders/", json=order((pid, 2)))).status_code == 200
+    response = await client.patch(f"/orders/{order_id}", json={"status": "pending"})
+    assert response.status_code == 400
+    doc = await Order.get_motor_collection().find_one({"_id": ObjectId(order_id)})
+    assert doc["status"] == "cancelled"
+    assert await stock(pid) == (1, [])
+
+async def test_order_created_cancelled_takes_no_stock_until_uncancelled(client):
+    [pid] = await create_products(client, 10)
+    response = await client.post("/orders/", json={**order((pid, 4)), "status": "cancelled"})
+    assert response.status_code == 200
+    assert await stock(pid) == (10, [])
+    assert await InventoryMovement.get_motor_collection().count_documents({"reason": "sale"}) == 0
+    assert (await client.patch(f"/orders/{response.json()['order_id']}", json={"status": "pending"})).status_code == 200
+    assert await stock(pid) == (6, [])
+    assert await InventoryMovement.get_motor_collection().count_documents({"reason": "sale"}) == 1
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from conftest import create_products
+from product_cache import product_costs
+
+pytestmark = pytest.mark.anyio
+
+async def test_product_pages_split_by_stock(client):
+    ids = await create_products(client, 0, 3, 0, 5, 1)
+    seen = []
+    cursor = None
+    while True:
+        params = {"in_stock": True, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/products/", params=params)).json()
+        seen += [p["product_id"] for p in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [ids[1], ids[3], ids[4]]
+    out = (await client.get("/products/", params={"in_stock": False})).json()
+    assert [p["product_id"] for p in out["items"]] == [ids[0], ids[2]]
+
+async def test_product_export_filters_by_stock_like_the_pages(client):
+    ids = await create_products(client, 0, 3, 0)
+    for in_stock, expected in ((True, [ids[1]]), (False, [ids[0], ids[2]])):
+        response = await client.get("/products/export", params={"format": "ndjson", "in_stock": in_stock})
+        assert response.status_code == 200
+        assert [json.loads(line)["product_id"] for line in response.text.splitlines()] == expected
+
+async def cache_version(db):
+    doc = await db["cache_versions"].find_one({"_id": "product_costs"})
+    return doc["version"] if doc else 0
+
+async def test_only_deleting_products_flushes_the_cost_cache(db, client):
+    [pid] = await create_products(client, 5)
+    await create_products(client, 1, 2)
+    assert (await client.post("/products/", json={"name": "Single", "purchase_price": 3, "start_quantity": 1})).status_code == 200
+    assert await cache_version(db) == 0
+    assert (await client.delete(f"/products/{pid}")).status_code == 200
+    assert await cache_version(db) == 1
+    assert await product_costs.get_many([pid]) == {}
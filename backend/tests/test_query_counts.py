@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import create_products
+from models.order import Order, OrderProductItem
+
+pytestmark = pytest.mark.anyio
+
+# Read endpoints must issue the same number of MongoDB commands however big
+# the collections are. X-DB-Query-Count comes from command monitoring, which
+# only a real mongod provides.
+
+ENDPOINTS = [
+    ("/products/", {}),
+    ("/products/", {"limit": 10}),
+    ("/orders/", {}),
+    ("/orders/", {"status": "pending", "sales_channel": "shopee"}),
+    ("/live_events/", {}),
+    ("/analytics/", {}),
+    ("/analytics/", {"sales_channel": "shopee"}),
+    ("/dashboard", {}),
+]
+
+async def seed(client, product_count, order_count, event_id):
+    product_ids = await create_products(client, *([50] * product_count))
+    orders = [
+        Order(
+            products=[OrderProductItem(product_id=product_ids[i % len(product_ids)], quantity=1)],
+            sales_channel="shopee", revenue=100, live_selling_event_id=event_id,
+        )
+        for i in range(order_count)
+    ]
+    await Order.insert_many(orders)
+
+async def query_counts(client):
+    counts = {}
+    for path, params in ENDPOINTS:
+        response = await client.get(path, params=params)
+        assert response.status_code == 200, path
+        counts[(path, tuple(sorted(params.items())))] = int(response.headers["X-DB-Query-Count"])
+    return counts
+
+async def test_read_endpoints_issue_constant_commands(mongod, client):
+    event = (await client.post("/live_events/", json={"ads_fee": 100})).json()
+    await seed(client, 5, 5, event["event_id"])
+    small = await query_counts(client)
+    await seed(client, 95, 495, event["event_id"])
+    large = await query_counts(client)
+    assert small == large
+
+async def create_order_query_count(client, product_ids, event_id):
+    body = {
+        "products": [{"product_id": pid, "quantity": 1} for pid in product_ids],
+        "sales_channel": "live_selling", "revenue": 100, "live_selling_event_id": event_id,
+    }
+    response = await client.post("/orders/", json=body)
+    assert response.status_code == 200
+    return int(response.headers["X-DB-Query-Count"])
+
+async def test_create_order_issues_constant_commands(mongod, client):
+    # Every line is reserved, priced and recorded in the same batched writes,
+    # so neither the number of lines nor the catalog size adds commands
+    event = (await client.post("/live_events/", json={"ads_fee": 100})).json()
+    counts = {}
+    for catalog in (20, 500):
+        product_ids = await create_products(client, *([50] * catalog))
+        counts[(catalog, 1)] = await create_order_query_count(client, product_ids[:1], event["event_id"])
+        counts[(catalog, 10)] = await create_order_query_count(client, product_ids[1:11], event["event_id"])
+    assert len(set(counts.values())) == 1, counts
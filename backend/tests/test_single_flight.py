@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight, make_key
+
+pytestmark = pytest.mark.anyio
+
+KEY = make_key("analytics", match={})
+
+def counting(results):
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        # Holds the computation open so the other callers find it in flight
+        await asyncio.sleep(0.01)
+        return results[len(calls) - 1]
+    return compute, calls
+
+async def test_concurrent_identical_calls_share_one_computation():
+    reads = SingleFlight(stale_seconds=0)
+    compute, calls = counting([{"total": 1}])
+    results = await asyncio.gather(*(reads.get("analytics", KEY, "v1", compute) for _ in range(5)))
+    assert len(calls) == 1
+    assert results == [("v1", {"total": 1})] * 5
+    assert all(value is results[0][1] for _, value in results)
+    assert reads.requests == {("analytics", "computed"): 1, ("analytics", "coalesced"): 4}
+    assert not reads._in_flight
+
+async def test_a_different_etag_recomputes():
+    reads = SingleFlight(stale_seconds=0)
+    compute, calls = counting([{"total": 1}, {"total": 2}])
+    assert await reads.get("analytics", KEY, "v1", compute) == ("v1", {"total": 1})
+    assert await reads.get("analytics", KEY, "v2", compute) == ("v2", {"total": 2})
+    assert len(calls) == 2
+
+async def test_stale_result_is_served_with_its_etag_while_one_refresh_runs():
+    reads = SingleFlight(stale_seconds=60)
+    compute, calls = counting([{"total": 1}, {"total": 2}])
+    assert await reads.get("analytics", KEY, "v1", compute) == ("v1", {"total": 1})
+    stale = await asyncio.gather(*(reads.get("analytics", KEY, "v2", compute) for _ in range(3)))
+    assert stale == [("v1", {"total": 1})] * 3
+    [refresh] = reads._in_flight.values()
+    await refresh
+    assert len(calls) == 2
+    assert await reads.get("analytics", KEY, "v2", compute) == ("v2", {"total": 2})
+    assert reads.requests[("analytics", "stale")] == 3
+    assert reads.requests[("analytics", "cached")] == 1
+
+async def test_failing_refresh_is_counted_and_not_left_in_flight():
+    reads = SingleFlight(stale_seconds=60)
+    compute, _ = counting([{"total": 1}])
+    await reads.get("analytics", KEY, "v1", compute)
+
+    async def failing():
+        raise RuntimeError("database unavailable")
+
+    assert await reads.get("analytics", KEY, "v2", failing) == ("v1", {"total": 1})
+    # Let the refresh task and its done callback run
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert reads.refresh_errors == 1
+    assert not reads._in_flight
+    assert "read_refresh_errors_total 1" in reads.render_metrics()
@@ -47,8 +47,35 @@ export const login = async (username, password) => {
   return response.data;
 };
 
-export const getProducts = async () => {
-  const response = await api.get('/products/');
+// List and analytics responses carry an ETag. Remember the last body per URL and
+// send If-None-Match, so an unchanged resource comes back as an empty 304.
+const etagCache = new Map();
+
+const cachedGet = async (url, params = {}) => {
+  const key = `${url}?${new URLSearchParams(params)}`;
+  const cached = etagCache.get(key);
+  const response = await api.get(url, {
+    params,
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || (cached && status === 304),
+  });
+  if (response.status === 304) {
+    return cached.data;
+  }
+  if (response.headers.etag) {
+    etagCache.set(key, { etag: response.headers.etag, data: response.data });
+  }
+  return response.data;
+};
+
+// List endpoints return one page, { items, next_cursor }; pass next_cursor back as `cursor`
+// for the page after it (see components/Pager.js)
+// params: { cursor, limit, in_stock }
+export const getProductsPage = async (params = {}) => cachedGet('/products/', params);
+
+// Name prefix search for pickers; returns up to `limit` { product_id, name, purchase_price, shipping_fee, remaining_quantity }
+export const searchProducts = async (q, { limit = 10, inStock = false } = {}) => {
+  const response = await api.get('/products/search', { params: { q, limit, in_stock: inStock } });
   return response.data;
 };
 
@@ -62,11 +89,20 @@ export const createProduct = async (product) => {
   return response.data;
 };
 
-export const getOrders = async () => {
-  const response = await api.get('/orders/');
+// Both return one { index, product_id, error } result per input item
+export const createProducts = async (products) => {
+  const response = await api.post('/products/bulk', products);
+  return response.data;
+};
+
+export const deleteProducts = async (productIds) => {
+  const response = await api.post('/products/bulk_delete', { product_ids: productIds });
   return response.data;
 };
 
+// params: { cursor, limit, status, sales_channel, start_date, end_date, live_selling_event_id }
+export const getOrdersPage = async (params = {}) => cachedGet('/orders/', params);
+
 export const createOrder = async (order) => {
   const response = await api.post('/orders/', order);
   return response.data;
@@ -77,15 +113,16 @@ export const updateOrderStatus = async (orderId, status) => {
   return response.data;
 };
 
-export const getAnalytics = async () => {
-  const response = await api.get('/analytics/');
-  return response.data;
-};
+// params: { start_date, end_date, sales_channel, live_selling_event_id } (all optional)
+export const getAnalytics = async (params = {}) => cachedGet('/analytics/', params);
 
-export const getLiveEvents = async () => {
-  const response = await api.get('/live_events/');
-  return response.data;
-};
+// Chart series, archived orders included: { by_day, by_channel, top_products }; same params as getAnalytics
+export const getAnalyticsBreakdown = async (params = {}) => cachedGet('/analytics/breakdown', params);
+
+// Dashboard sections in one request; params: { fields: 'analytics,counts,...' } (optional)
+export const getDashboard = async (params = {}) => cachedGet('/dashboard', params);
+
+export const getLiveEvents = async () => cachedGet('/live_events/');
 
 export const createLiveEvent = async (event) => {
   const response = await api.post('/live_events/', event);
@@ -97,4 +134,17 @@ export const deleteLiveEvent = async (eventId) => {
   return response.data;
 };
 
+// Server-Sent Events from /live_feed. handlers maps a message type (order_created,
+// stock_changed, order_status, event_created, event_updated, resync) to a callback.
+// EventSource can't send headers, so the token goes in the query string.
+// Returns a function that closes the stream.
+export const subscribeLiveFeed = (handlers) => {
+  const token = localStorage.getItem('access_token') || '';
+  const source = new EventSource(`${API_BASE_URL}/live_feed?token=${encodeURIComponent(token)}`);
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+  });
+  return () => source.close();
+};
+
 export default api;
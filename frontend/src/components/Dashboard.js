@@ -1,32 +1,58 @@
-import React, { useEffect, useState } from 'react';
-import { getProducts, getOrders, getAnalytics } from '../api';
+import React, { useEffect, useRef, useState } from 'react';
+import { getDashboard, subscribeLiveFeed } from '../api';
 import { Box, Typography, Paper, Grid, CircularProgress, Alert, Table, TableBody, TableCell, TableContainer, TableHead, TableRow } from '@mui/material';
 
 const Dashboard = () => {
-  const [products, setProducts] = useState([]);
-  const [orders, setOrders] = useState([]);
-  const [analytics, setAnalytics] = useState(null);
+  const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
-  useEffect(() => {
-    Promise.all([
-      getProducts(),
-      getOrders(),
-      getAnalytics()
-    ])
-      .then(([prods, ords, an]) => {
-        setProducts(prods);
-        setOrders(ords);
-        setAnalytics(an);
-      })
+  const refreshTimer = useRef(null);
+
+  // One request for every section (see GET /dashboard)
+  const fetchAll = () =>
+    getDashboard()
+      .then(setData)
       .catch(() => setError('Failed to fetch dashboard data'))
       .finally(() => setLoading(false));
+
+  // Refetch at most every 2s during a burst of sales
+  const scheduleRefresh = () => {
+    if (refreshTimer.current) return;
+    refreshTimer.current = setTimeout(() => {
+      refreshTimer.current = null;
+      getDashboard().then(setData).catch(() => {});
+    }, 2000);
+  };
+
+  useEffect(() => {
+    fetchAll();
+    // New orders and status changes show up right away; the rest catches up on the next refresh
+    const unsubscribe = subscribeLiveFeed({
+      order_created: (order) => {
+        setData(prev => prev && { ...prev, recent_orders: [order, ...prev.recent_orders].slice(0, 5) });
+        scheduleRefresh();
+      },
+      order_status: ({ order_id, status }) => {
+        setData(prev => prev && { ...prev, recent_orders: prev.recent_orders.map(o => (o.order_id === order_id ? { ...o, status } : o)) });
+        scheduleRefresh();
+      },
+      stock_changed: scheduleRefresh,
+      event_created: scheduleRefresh,
+      event_updated: scheduleRefresh,
+      resync: fetchAll,
+    });
+    return () => {
+      unsubscribe();
+      clearTimeout(refreshTimer.current);
+    };
   }, []);
 
-  const lowStock = products.filter(p => p.remaining_quantity <= 3);
-  const recentOrders = orders.slice(-5).reverse();
-  const recentProducts = products.slice(-5).reverse();
+  const analytics = data ? data.analytics : null;
+  const lowStock = data ? data.low_stock : [];
+  const recentOrders = data ? data.recent_orders : [];
+  const recentProducts = data ? data.recent_products : [];
+  const upcomingEvents = data ? data.upcoming_events : [];
 
   return (
     <Box sx={{ maxWidth: 1100, mx: 'auto', mt: 4 }}>
@@ -39,13 +65,13 @@ const Dashboard = () => {
             <Grid item xs={12} sm={6} md={3}>
               <Paper sx={{ p: 2, textAlign: 'center' }}>
                 <Typography variant="h6">Total Products</Typography>
-                <Typography variant="h4">{products.length}</Typography>
+                <Typography variant="h4">{data ? data.counts.products : '-'}</Typography>
               </Paper>
             </Grid>
             <Grid item xs={12} sm={6} md={3}>
               <Paper sx={{ p: 2, textAlign: 'center' }}>
                 <Typography variant="h6">Total Orders</Typography>
-                <Typography variant="h4">{orders.length}</Typography>
+                <Typography variant="h4">{data ? data.counts.orders : '-'}</Typography>
               </Paper>
             </Grid>
             <Grid item xs={12} sm={6} md={3}>
@@ -82,9 +108,9 @@ const Dashboard = () => {
                           <TableCell>{order.order_id.slice(-6)}</TableCell>
                           <TableCell>
                             {order.products && order.products.map((item, idx) => {
-                              const prod = products.find(p => String(p.product_id) === String(item.product_id));
+                              const name = order.product_names && order.product_names[item.product_id];
                               return (
-                                <span key={idx}>{prod ? prod.name : item.product_id} × {item.quantity}{idx < order.products.length - 1 ? ', ' : ''}</span>
+                                <span key={idx}>{name || item.product_id} × {item.quantity}{idx < order.products.length - 1 ? ', ' : ''}</span>
                               );
                             })}
                           </TableCell>
@@ -95,6 +121,29 @@ const Dashboard = () => {
                     </TableBody>
                   </Table>
                 </TableContainer>
+                <Typography variant="h6" sx={{ mt: 3 }} gutterBottom>Upcoming Live Events</Typography>
+                <TableContainer>
+                  <Table size="small">
+                    <TableHead>
+                      <TableRow>
+                        <TableCell>Date</TableCell>
+                        <TableCell>Ads Fee</TableCell>
+                        <TableCell>Orders</TableCell>
+                      </TableRow>
+                    </TableHead>
+                    <TableBody>
+                      {upcomingEvents.length === 0 ? (
+                        <TableRow><TableCell colSpan={3} align="center">No upcoming events</TableCell></TableRow>
+                      ) : upcomingEvents.map(event => (
+                        <TableRow key={event.event_id}>
+                          <TableCell>{event.event_date}</TableCell>
+                          <TableCell>{event.ads_fee.toLocaleString(undefined, { style: 'currency', currency: 'THB' })}</TableCell>
+                          <TableCell>{event.order_count}</TableCell>
+                        </TableRow>
+                      ))}
+                    </TableBody>
+                  </Table>
+                </TableContainer>
               </Paper>
             </Grid>
             <Grid item xs={12} md={6}>
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { getLiveEvents, createLiveEvent, deleteLiveEvent } from '../api';
+import { getLiveEvents, createLiveEvent, deleteLiveEvent, subscribeLiveFeed } from '../api';
 import { Box, Typography, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Button, TextField, IconButton, Dialog, DialogTitle, DialogContent, DialogActions } from '@mui/material';
 import DeleteIcon from '@mui/icons-material/Delete';
 
@@ -17,6 +17,16 @@ const LiveSellingEvents = () => {
 
   useEffect(() => {
     fetchEvents();
+    const upsert = (event) => setEvents(prev => (
+      prev.some(e => e.event_id === event.event_id)
+        ? prev.map(e => (e.event_id === event.event_id ? event : e))
+        : [...prev, event]
+    ));
+    return subscribeLiveFeed({
+      event_created: upsert,
+      event_updated: upsert,
+      resync: fetchEvents,
+    });
   }, []);
 
   const handleCreate = async () => {
@@ -94,6 +104,7 @@ const LiveSellingEvents = () => {
             <TableRow>
               <TableCell>Event Date</TableCell>
               <TableCell>Ads Fee (THB)</TableCell>
+              <TableCell>Orders</TableCell>
               <TableCell>Notes</TableCell>
               <TableCell>Event ID</TableCell>
               <TableCell align="right">Actions</TableCell>
@@ -104,6 +115,7 @@ const LiveSellingEvents = () => {
               <TableRow key={event.event_id}>
                 <TableCell>{event.event_date}</TableCell>
                 <TableCell>฿{Number(event.ads_fee).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
+                <TableCell>{event.order_count}</TableCell>
                 <TableCell>{event.notes || '-'}</TableCell>
                 <TableCell>{event.event_id}</TableCell>
                 <TableCell align="right">
@@ -112,7 +124,7 @@ const LiveSellingEvents = () => {
               </TableRow>
             ))}
             {events.length === 0 && (
-              <TableRow><TableCell colSpan={5} align="center">No events found.</TableCell></TableRow>
+              <TableRow><TableCell colSpan={6} align="center">No events found.</TableCell></TableRow>
             )}
           </TableBody>
         </Table>
@@ -1,14 +1,57 @@
 import React, { useEffect, useState } from 'react';
-import { getProducts, getOrders, createOrder, updateOrderStatus, getLiveEvents } from '../api';
-import { Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Typography, Button, TextField, Select, MenuItem, IconButton, Box, Tooltip } from '@mui/material';
+import { getOrdersPage, createOrder, updateOrderStatus, getLiveEvents, searchProducts } from '../api';
+import { Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Typography, Button, TextField, Select, MenuItem, IconButton, Box, Tooltip, Autocomplete } from '@mui/material';
 import AddCircleIcon from '@mui/icons-material/AddCircle';
 import RemoveCircleIcon from '@mui/icons-material/RemoveCircle';
+import { usePager, PagerControls } from './Pager';
 
-const defaultProductRow = { product_id: '', quantity: 1, touched: false };
+const defaultProductRow = { product_id: '', product: null, quantity: 1, touched: false };
+
+// Searches the catalog on the server as you type (GET /products/search)
+const ProductPicker = ({ value, onChange, onBlur, error, excludeIds }) => {
+  const [input, setInput] = useState('');
+  const [options, setOptions] = useState([]);
+
+  useEffect(() => {
+    if (!input.trim()) {
+      setOptions([]);
+      return undefined;
+    }
+    let active = true;
+    const timer = setTimeout(() => {
+      searchProducts(input, { inStock: true })
+        .then(results => { if (active) setOptions(results); })
+        .catch(() => {});
+    }, 150);
+    return () => {
+      active = false;
+      clearTimeout(timer);
+    };
+  }, [input]);
+
+  return (
+    <Autocomplete
+      value={value}
+      options={value && !options.some(p => p.product_id === value.product_id) ? [value, ...options] : options}
+      filterOptions={x => x}
+      getOptionLabel={p => p.name}
+      getOptionDisabled={p => excludeIds.includes(p.product_id)}
+      isOptionEqualToValue={(a, b) => a.product_id === b.product_id}
+      onChange={(_, product) => onChange(product)}
+      onInputChange={(_, text) => setInput(text)}
+      onBlur={onBlur}
+      renderOption={(props, p) => (
+        <li {...props} key={p.product_id}>{p.name} (Remain: {p.remaining_quantity})</li>
+      )}
+      renderInput={params => <TextField {...params} placeholder="Search product" error={error} />}
+      noOptionsText={input.trim() ? 'No matching products in stock' : 'Type to search'}
+      sx={{ minWidth: 240 }}
+    />
+  );
+};
 
 const Orders = () => {
-  const [products, setProducts] = useState([]);
-  const [orders, setOrders] = useState([]);
+  const orders = usePager(getOrdersPage);
   const [productRows, setProductRows] = useState([{ ...defaultProductRow }]);
   const [salesChannel, setSalesChannel] = useState('Shopee');
   const [shopeeFee, setShopeeFee] = useState(0);
@@ -30,15 +73,14 @@ const Orders = () => {
   });
 
   useEffect(() => {
-    getProducts().then(setProducts);
-    getOrders().then(setOrders);
     getLiveEvents().then(setLiveEvents);
   }, []);
 
   const handleProductChange = (idx, field, value) => {
     const rows = [...productRows];
-    if (field === 'product_id') {
-      rows[idx][field] = String(value);
+    if (field === 'product') {
+      rows[idx].product = value;
+      rows[idx].product_id = value ? String(value.product_id) : '';
       rows[idx].touched = true;
     } else {
       rows[idx][field] = value;
@@ -54,7 +96,7 @@ const Orders = () => {
   };
 
 
-  const addProductRow = () => setProductRows([...productRows, { product_id: '', quantity: 1, touched: false }]);
+  const addProductRow = () => setProductRows([...productRows, { ...defaultProductRow }]);
   const removeProductRow = (idx) => setProductRows(productRows.filter((_, i) => i !== idx));
 
   const handleSubmit = async (e) => {
@@ -75,7 +117,7 @@ const Orders = () => {
     const isLiveSell = salesChannel && salesChannel.toLowerCase().includes('live');
     try {
       await createOrder({
-        products: validRows,
+        products: validRows.map(row => ({ product_id: row.product_id, quantity: row.quantity })),
         sales_channel: salesChannel,
         shopee_fee: isLiveSell ? 0 : Number(shopeeFee),
         seller_coupon: isLiveSell ? 0 : Number(sellerCoupon),
@@ -92,8 +134,9 @@ const Orders = () => {
         const today = new Date();
         return today.toISOString().slice(0, 10);
       });
-      getOrders().then(setOrders);
-      getProducts().then(setProducts); // Fetch latest products after order
+      orders.reload();
+      // The event's order_count, and so every ads_fee share, just changed
+      getLiveEvents().then(setLiveEvents);
     } catch {
       setMessage('Failed to create order.');
     }
@@ -117,21 +160,13 @@ const Orders = () => {
         {productRows.map((row, idx) => (
           <Box key={idx} display="flex" alignItems="center" gap={2} mb={1}>
             
-            <Select
-              value={String(row.product_id)}
-              onChange={e => handleProductChange(idx, 'product_id', e.target.value)}
+            <ProductPicker
+              value={row.product}
+              onChange={product => handleProductChange(idx, 'product', product)}
               onBlur={() => handleProductBlur(idx)}
-              displayEmpty
               error={!row.product_id && row.touched}
-              sx={{ minWidth: 180 }}
-            >
-              <MenuItem value=""><em>Select Product</em></MenuItem>
-              {products.filter(p => p.remaining_quantity > 0).map(p => (
-                <MenuItem key={p.product_id} value={String(p.product_id)} disabled={productRows.some((row, i) => String(row.product_id) === String(p.product_id) && i !== idx)}>
-                  {p.name} (Remain: {p.remaining_quantity})
-                </MenuItem>
-              ))}
-            </Select>
+              excludeIds={productRows.filter((_, i) => i !== idx).map(r => r.product_id)}
+            />
             <TextField
               type="number"
               label="Quantity"
@@ -231,10 +266,8 @@ const Orders = () => {
               </TableRow>
             </TableHead>
             <TableBody>
-              {[...orders]
-                .sort((a, b) => new Date(b.sold_date) - new Date(a.sold_date))
-                .map(order => (
-                <TableRow key={order.sold_date}>
+              {orders.items.map(order => (
+                <TableRow key={order.order_id}>
                   <TableCell>{order.sold_date ? order.sold_date : '-'}</TableCell>
                   <TableCell>{
                     order.order_id && order.order_id.length > 10
@@ -242,12 +275,9 @@ const Orders = () => {
                       : order.order_id
                   }</TableCell>
                   <TableCell>
-                    {order.products && order.products.map((item, idx) => {
-                      const prod = products.find(p => String(p.product_id) === String(item.product_id));
-                      return (
-                        <div key={idx}>{prod ? prod.name : item.product_id} × {item.quantity}</div>
-                      );
-                    })}
+                    {order.products && order.products.map((item, idx) => (
+                      <div key={idx}>{(order.product_names && order.product_names[item.product_id]) || item.product_id} × {item.quantity}</div>
+                    ))}
                   </TableCell>
                   <TableCell>{order.sales_channel}</TableCell>
                   <TableCell>฿{Number(order.revenue).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
@@ -255,28 +285,15 @@ const Orders = () => {
                   <TableCell>฿{Number(order.shipping_fee).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
                   <TableCell>฿{Number(order.seller_coupon).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
                   <TableCell>
-                    {order.live_selling_event_id && liveEvents.length > 0
-                      ? (() => {
-                          const ev = liveEvents.find(e => e.event_id === order.live_selling_event_id);
-                          if (!ev) return '-';
-                          // Count orders with this event_id
-                          const count = orders.filter(o => o.live_selling_event_id === ev.event_id).length;
-                          return count > 0 ? `฿${(ev.ads_fee / count).toLocaleString('en-US', { minimumFractionDigits: 2 })}` : '-';
-                        })()
+                    {liveEvents.some(e => e.event_id === order.live_selling_event_id)
+                      ? `฿${formatBaht(adsFeeShare(order, liveEvents))}`
                       : '-'}
                   </TableCell>
                   <TableCell>
-                    {'฿' + (  
-                      order.products
-                        ? order.products.reduce((sum, item) => {
-                            const prod = products.find(p => String(p.product_id) === String(item.product_id));
-                            return sum + (prod ? (prod.purchase_price || 0) * (item.quantity || 1) : 0);
-                          }, 0).toLocaleString('en-US', { minimumFractionDigits: 2 })
-                        : 0
-                    )}
+                    {'฿' + formatBaht(productCost(order, liveEvents))}
                   </TableCell>
                   <TableCell>
-                    {'\u0e3f' + (order.total_cost !== undefined ? Number(order.total_cost).toLocaleString('en-US', { minimumFractionDigits: 2 }) : calculate_total_cost(order, products, liveEvents, orders))}
+                    {'\u0e3f' + formatBaht(order.total_cost)}
                   </TableCell>
                   <TableCell>
                     <Tooltip 
@@ -284,30 +301,18 @@ const Orders = () => {
                         <div style={{ fontSize: '12px', lineHeight: '1.4' }}>
                           <div><strong>Profit Calculation:</strong></div>
                           <div>Revenue: ฿{Number(order.revenue || 0).toLocaleString('en-US', { minimumFractionDigits: 2 })}</div>
-                          <div>- Total Cost: ฿{order.total_cost !== undefined ? Number(order.total_cost).toLocaleString('en-US', { minimumFractionDigits: 2 }) : calculate_total_cost(order, products, liveEvents, orders)}</div>
+                          <div>- Total Cost: ฿{formatBaht(order.total_cost)}</div>
                           <div style={{ borderTop: '1px solid #ccc', paddingTop: '4px', marginTop: '4px' }}>
-                            <strong>= Profit: ฿{order.profit !== undefined ? Number(order.profit).toLocaleString('en-US', { minimumFractionDigits: 2 }) : calculate_profit(order, products, liveEvents, orders)}</strong>
+                            <strong>= Profit: ฿{formatBaht(order.profit)}</strong>
                           </div>
                           <div style={{ marginTop: '8px', fontSize: '11px', opacity: 0.8 }}>
                             <div><strong>Cost Breakdown:</strong></div>
-                            <div>• Product Cost: ฿{order.products ? order.products.reduce((sum, item) => {
-                              const prod = products.find(p => String(p.product_id) === String(item.product_id));
-                              return sum + (prod ? (prod.purchase_price || 0) * (item.quantity || 1) : 0);
-                            }, 0).toLocaleString('en-US', { minimumFractionDigits: 2 }) : '0.00'}</div>
-                            <div>• Product Shipping: ฿{order.products ? order.products.reduce((sum, item) => {
-                              const prod = products.find(p => String(p.product_id) === String(item.product_id));
-                              return sum + (prod ? (prod.shipping_fee || 0) * (item.quantity || 1) : 0);
-                            }, 0).toLocaleString('en-US', { minimumFractionDigits: 2 }) : '0.00'}</div>
+                            <div>• Product Cost and Shipping: ฿{formatBaht(productCost(order, liveEvents))}</div>
                             <div>• Shopee Fee: ฿{Number(order.shopee_fee || 0).toLocaleString('en-US', { minimumFractionDigits: 2 })}</div>
                             <div>• Shipping Fee: ฿{Number(order.shipping_fee || 0).toLocaleString('en-US', { minimumFractionDigits: 2 })}</div>
                             <div>• Seller Coupon: ฿{Number(order.seller_coupon || 0).toLocaleString('en-US', { minimumFractionDigits: 2 })}</div>
                             {order.live_selling_event_id && (
-                              <div>• Ads Fee: ฿{(() => {
-                                const ev = liveEvents.find(e => e.event_id === order.live_selling_event_id);
-                                if (!ev) return '0.00';
-                                const count = orders.filter(o => o.live_selling_event_id === ev.event_id).length;
-                                return count > 0 ? (ev.ads_fee / count).toLocaleString('en-US', { minimumFractionDigits: 2 }) : '0.00';
-                              })()}</div>
+                              <div>• Ads Fee: ฿{formatBaht(adsFeeShare(order, liveEvents))}</div>
                             )}
                           </div>
                         </div>
@@ -316,7 +321,7 @@ const Orders = () => {
                       arrow
                     >
                       <span style={{ cursor: 'help' }}>
-                        {'฿' + (order.profit !== undefined ? Number(order.profit).toLocaleString('en-US', { minimumFractionDigits: 2 }) : calculate_profit(order, products, liveEvents, orders))}
+                        {'฿' + formatBaht(order.profit)}
                       </span>
                     </Tooltip>
                   </TableCell>
@@ -327,7 +332,7 @@ const Orders = () => {
                         try {
                           await updateOrderStatus(order.order_id, e.target.value);
                           setMessage('Order status updated!');
-                          getOrders().then(setOrders);
+                          orders.reload();
                         } catch {
                           setMessage('Failed to update status.');
                         }
@@ -345,55 +350,26 @@ const Orders = () => {
             </TableBody>
           </Table>
         </TableContainer>
+        <PagerControls pager={orders} />
       </Box>
     </Box>
   );
 };
 
 
-function calculate_total_cost(order, products, liveEvents, orders) {
-  const shopeeFee = Number(order.shopee_fee || 0);
-  const shippingFee = Number(order.shipping_fee || 0);
-  const sellerCoupon = Number(order.seller_coupon || 0);
-  const productCost = order.products
-    ? order.products.reduce((sum, item) => {
-        const prod = products.find(p => String(p.product_id) === String(item.product_id));
-        return sum + (prod ? (prod.purchase_price || 0) * (item.quantity || 1) : 0);
-      }, 0)
-    : 0;
-  const adsFee = (order.live_selling_event_id && liveEvents.length > 0)
-    ? (() => {
-        const ev = liveEvents.find(e => e.event_id === order.live_selling_event_id);
-        if (!ev) return 0;
-        const count = orders.filter(o => o.live_selling_event_id === ev.event_id).length;
-        return count > 0 ? (ev.ads_fee / count) : 0;
-      })()
-    : 0;
-  const total = shopeeFee + shippingFee + sellerCoupon + productCost + adsFee;
-  return total.toLocaleString('en-US', { minimumFractionDigits: 2 });
+const formatBaht = (value) => Number(value || 0).toLocaleString('en-US', { minimumFractionDigits: 2 });
+
+// The event's ads_fee split over all of its orders, as the backend allocates it
+function adsFeeShare(order, liveEvents) {
+  const ev = liveEvents.find(e => e.event_id === order.live_selling_event_id);
+  return ev ? Number(ev.ads_fee || 0) / Math.max(ev.order_count || 0, 1) : 0;
 }
 
-function calculate_profit(order, products, liveEvents, orders) {
-  const revenue = Number(order.revenue || 0);
-  const shopeeFee = Number(order.shopee_fee || 0);
-  const shippingFee = Number(order.shipping_fee || 0);
-  const sellerCoupon = Number(order.seller_coupon || 0);
-  const productCost = order.products
-    ? order.products.reduce((sum, item) => {
-        const prod = products.find(p => String(p.product_id) === String(item.product_id));
-        return sum + (prod ? (prod.purchase_price || 0) * (item.quantity || 1) : 0);
-      }, 0)
-    : 0;
-  const adsFee = (order.live_selling_event_id && liveEvents.length > 0)
-    ? (() => {
-        const ev = liveEvents.find(e => e.event_id === order.live_selling_event_id);
-        if (!ev) return 0;
-        const count = orders.filter(o => o.live_selling_event_id === ev.event_id).length;
-        return count > 0 ? (ev.ads_fee / count) : 0;
-      })()
-    : 0;
-  const profit = revenue - (shopeeFee + shippingFee + sellerCoupon + productCost + adsFee);
-  return profit.toLocaleString('en-US', { minimumFractionDigits: 2 });
+// total_cost is the backend's base_cost plus the ads_fee share, and base_cost is
+// the products' purchase price and shipping plus shopee fee, shipping fee and seller coupon
+function productCost(order, liveEvents) {
+  const fees = Number(order.shopee_fee || 0) + Number(order.shipping_fee || 0) + Number(order.seller_coupon || 0);
+  return Number(order.total_cost || 0) - adsFeeShare(order, liveEvents) - fees;
 }
 
 export default Orders;
@@ -0,0 +1,46 @@
+import { useCallback, useEffect, useState } from 'react';
+import { Box, Button, Typography } from '@mui/material';
+
+export const PAGE_SIZE = 50;
+
+// One page of a cursor-paged list endpoint at a time. fetchPage(params) returns
+// { items, next_cursor }; the cursors of the pages before the current one are
+// kept so Previous can go back. Changing `params` starts again from page one.
+export const usePager = (fetchPage, params = {}) => {
+  const key = JSON.stringify(params);
+  const [cursors, setCursors] = useState([null]);
+  const [page, setPage] = useState({ items: [], next_cursor: null });
+  const [error, setError] = useState('');
+
+  const cursor = cursors[cursors.length - 1];
+
+  const load = useCallback(() => {
+    const query = { ...JSON.parse(key), limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) };
+    return fetchPage(query)
+      .then(data => { setPage(data); setError(''); })
+      .catch(() => setError('Failed to load page.'));
+  }, [fetchPage, key, cursor]);
+
+  useEffect(() => { setCursors([null]); }, [key]);
+  useEffect(() => { load(); }, [load]);
+
+  return {
+    items: page.items,
+    error,
+    pageNumber: cursors.length,
+    hasPrev: cursors.length > 1,
+    hasNext: Boolean(page.next_cursor),
+    next: () => page.next_cursor && setCursors(prev => [...prev, page.next_cursor]),
+    prev: () => setCursors(prev => (prev.length > 1 ? prev.slice(0, -1) : prev)),
+    reload: load,
+  };
+};
+
+export const PagerControls = ({ pager }) => (
+  <Box display="flex" alignItems="center" justifyContent="flex-end" gap={2} mt={1}>
+    {pager.error && <Typography color="red">{pager.error}</Typography>}
+    <Button size="small" onClick={pager.prev} disabled={!pager.hasPrev}>Previous</Button>
+    <Typography variant="body2">Page {pager.pageNumber}</Typography>
+    <Button size="small" onClick={pager.next} disabled={!pager.hasNext}>Next</Button>
+  </Box>
+);
@@ -1,9 +1,14 @@
-import React, { useEffect, useState } from 'react';
-import { getProducts, createProduct, deleteProduct } from '../api';
+import React, { useState } from 'react';
+import { getProductsPage, createProduct, deleteProduct } from '../api';
 import { Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Paper, Typography, TextField, Button, Box } from '@mui/material';
+import { usePager, PagerControls } from './Pager';
+
+const IN_STOCK = { in_stock: true };
+const OUT_OF_STOCK = { in_stock: false };
 
 const Products = () => {
-  const [products, setProducts] = useState([]);
+  const inStock = usePager(getProductsPage, IN_STOCK);
+  const outOfStock = usePager(getProductsPage, OUT_OF_STOCK);
   const todayStr = new Date().toISOString().slice(0, 10);
   const [productRows, setProductRows] = useState([
     { name: '', purchasePrice: '', startQuantity: '', registrationDate: todayStr }
@@ -11,9 +16,10 @@ const Products = () => {
   const [sharedShippingFee, setSharedShippingFee] = useState('');
   const [message, setMessage] = useState('');
 
-  useEffect(() => {
-    getProducts().then(setProducts).catch(() => setProducts([]));
-  }, []);
+  const reloadProducts = () => {
+    inStock.reload();
+    outOfStock.reload();
+  };
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -43,7 +49,7 @@ const Products = () => {
       setProductRows([{ name: '', purchasePrice: '', startQuantity: '', registrationDate: todayStr }]);
       setSharedShippingFee('');
       setMessage('All products added!');
-      getProducts().then(setProducts);
+      reloadProducts();
     } catch {
       setMessage('Failed to add products.');
     }
@@ -114,7 +120,7 @@ const Products = () => {
             </TableRow>
           </TableHead>
           <TableBody>
-            {products.filter(product => product.remaining_quantity > 0).map((product) => (
+            {inStock.items.map((product) => (
               <TableRow key={product.product_id}>
                 <TableCell>{product.name}</TableCell>
                 <TableCell>฿{Number(product.purchase_price).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
@@ -132,7 +138,7 @@ const Products = () => {
                         try {
                           await deleteProduct(product.product_id);
                           setMessage(`Deleted '${product.name}' successfully!`);
-                          getProducts().then(setProducts);
+                          reloadProducts();
                         } catch {
                           setMessage('Failed to delete product.');
                         }
@@ -147,9 +153,10 @@ const Products = () => {
           </TableBody>
         </Table>
       </TableContainer>
+      <PagerControls pager={inStock} />
 
       {/* Out of Stock Section */}
-      {products.filter(product => product.remaining_quantity === 0).length > 0 && (
+      {(outOfStock.items.length > 0 || outOfStock.hasPrev) && (
         <Box mt={4}>
           <Typography variant="h6" color="error" gutterBottom>Out of Stock</Typography>
           <TableContainer component={Paper}>
@@ -165,7 +172,7 @@ const Products = () => {
                 </TableRow>
               </TableHead>
               <TableBody>
-                {products.filter(product => product.remaining_quantity === 0).map(product => (
+                {outOfStock.items.map(product => (
                   <TableRow key={product.product_id}>
                     <TableCell>{product.name}</TableCell>
                     <TableCell>฿{Number(product.purchase_price).toLocaleString('en-US', { minimumFractionDigits: 2 })}</TableCell>
@@ -182,7 +189,7 @@ const Products = () => {
                             try {
                               await deleteProduct(product.product_id);
                               setMessage(`Deleted '${product.name}' successfully!`);
-                              getProducts().then(setProducts);
+                              reloadProducts();
                             } catch {
                               setMessage('Failed to delete product.');
                             }
@@ -197,6 +204,7 @@ const Products = () => {
               </TableBody>
             </Table>
           </TableContainer>
+          <PagerControls pager={outOfStock} />
         </Box>
       )}
 